@@ -0,0 +1,154 @@
+import time
+import atexit
+import threading
+
+import database_manager as db
+
+# Flush when this many attempts are buffered...
+FLUSH_BATCH_SIZE = 100
+# ...or when the oldest buffered attempt is this old (seconds)
+FLUSH_INTERVAL = 1.0
+# Backpressure: past this many pending attempts, log_attempt() flushes inline
+MAX_PENDING = 5000
+
+
+class AttemptLogger:
+    """
+    Write-behind buffer for attempts.
+    log_attempt() only appends to memory; a background thread writes the
+    buffer in grouped transactions (db.log_attempts) based on size/time.
+    The buffer is registered with database_manager, so any read of attempts
+    flushes it first, and it is flushed at interpreter exit.
+    """
+
+    def __init__(self, batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._buffer = []
+        self._lock = threading.Lock()        # Guards the buffer
+        self._flush_lock = threading.Lock()  # One flush at a time
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+
+        self.metrics = {
+            "logged": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "largest_batch": 0,
+            "flush_seconds": 0.0,
+            "backpressure_events": 0,
+            "backpressure_seconds": 0.0,
+            "peak_pending": 0,
+        }
+
+        db.register_flush_hook(self.flush)
+        atexit.register(self.close)
+
+    def log_attempt(self, problem_id, is_success, error_message="", time_taken=0.0, cases=None, cached=False,
+                    outcome=None, memory=None, user_id=None):
+        """Buffers one attempt (same arguments as db.log_attempt)."""
+        if user_id is None:
+            user_id = db.get_current_user()
+        if self._closed:
+            db.log_attempt(problem_id, is_success, error_message, time_taken, cases, cached, outcome, memory, user_id)
+            return
+
+        row = (problem_id, db.now_ms(), is_success, error_message, time_taken, user_id,
+               cases, cached, outcome, memory)
+        with self._lock:
+            self._buffer.append(row)
+            pending = len(self._buffer)
+            self.metrics["logged"] += 1
+            self.metrics["peak_pending"] = max(self.metrics["peak_pending"], pending)
+
+        self._ensure_thread()
+        if pending >= self.max_pending:
+            # Backpressure: the writer can't keep up, so the producer pays for the flush
+            start = time.perf_counter()
+            self.flush()
+            self.metrics["backpressure_events"] += 1
+            self.metrics["backpressure_seconds"] += time.perf_counter() - start
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self):
+        """Writes everything buffered so far. Returns the number of attempts written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                db.log_attempts(batch)
+            except Exception:
+                # Put the batch back in front so nothing is lost or reordered
+                with self._lock:
+                    self._buffer[:0] = batch
+                self.metrics["failed_flushes"] += 1
+                raise
+
+            self.metrics["flushes"] += 1
+            self.metrics["flushed"] += len(batch)
+            self.metrics["largest_batch"] = max(self.metrics["largest_batch"], len(batch))
+            self.metrics["flush_seconds"] += time.perf_counter() - start
+            return len(batch)
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def get_metrics(self):
+        """Returns a snapshot of the flush/backpressure counters."""
+        snapshot = dict(self.metrics)
+        snapshot["pending"] = self.pending()
+        snapshot["avg_batch"] = snapshot["flushed"] / snapshot["flushes"] if snapshot["flushes"] else 0.0
+        return snapshot
+
+    def close(self):
+        """Stops the background writer and flushes what is left."""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        db.close_connection()
+
+    def _ensure_thread(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="attempt-logger", daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Could not write attempts (will retry): {e}")
+        db.close_connection()
+
+
+# Shared instance used by the CLI, GUI and batch tools
+default_logger = AttemptLogger()
+
+def log_attempt(problem_id, is_success, error_message="", time_taken=0.0, cases=None, cached=False, outcome=None,
+                memory=None, user_id=None):
+    """Buffers an attempt on the shared write-behind logger."""
+    default_logger.log_attempt(problem_id, is_success, error_message, time_taken, cases, cached, outcome, memory,
+                               user_id)
+
+def flush():
+    return default_logger.flush()
+
+def get_metrics():
+    return default_logger.get_metrics()
@@ -0,0 +1,292 @@
+import re
+import gc
+import ast
+import sys
+import copy
+import math
+import time
+import random
+import importlib
+
+import database_manager as db
+import ingestion as ingest
+import test_runner as runner
+
+# Input sizes: a geometric ladder, cut short once a size gets too slow
+SIZE_START = 8
+SIZE_FACTOR = 2
+SIZE_MAX = 2 ** 16
+# Stop climbing the ladder once one call takes longer than this (seconds)
+SLOW_CALL_SECONDS = 0.02
+# Each size is timed REPEATS times (the fastest is kept); one timing loops
+# over the call until it lasts at least MIN_TIMING_SECONDS
+REPEATS = 5
+MIN_TIMING_SECONDS = 0.005
+# Only the largest sizes are fitted (small n is dominated by call overhead)
+FIT_POINTS = 5
+# Profiling runs user code on a pool worker, so it gets the usual limits
+# except for a longer wall clock and CPU budget
+PROFILE_LIMITS = {"wall_seconds": 60.0, "cpu_seconds": 30}
+# Slopes further apart than this mean a different complexity class
+ASYMPTOTIC_MARGIN = 0.3
+# Earlier profiles of the same problem shown under a new one
+EARLIER_PROFILES = 5
+
+# (largest log-log slope, class), checked in order
+COMPLEXITY_CLASSES = [
+    (0.3, "O(1) / O(log n)"),
+    (0.8, "O(√n)"),
+    (1.15, "O(n)"),
+    (1.5, "O(n log n)"),
+    (2.4, "O(n²)"),
+    (3.4, "O(n³)"),
+]
+
+FUNCTION_IMPORT_PATTERN = re.compile(r'from exercise import (\w+)')
+
+
+# --- INPUTS ---
+def find_function_name(test_code):
+    """The solution function the tests import ('from exercise import X')."""
+    match = FUNCTION_IMPORT_PATTERN.search(test_code)
+    return match.group(1) if match else None
+
+def find_examples(test_code, function_name):
+    """
+    Returns the literal argument tuples the tests call function_name with,
+    e.g. [(3,), (5,), (1,)] for generate_square. Calls with non-literal
+    arguments are skipped.
+    """
+    try:
+        tree = ast.parse(test_code)
+    except SyntaxError:
+        return []
+    examples = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name)
+                and node.func.id == function_name and not node.keywords):
+            try:
+                examples.append(tuple(ast.literal_eval(arg) for arg in node.args))
+            except ValueError:
+                continue
+    return examples
+
+def scale_value(value, n, rng):
+    """An input like 'value' but of size n (ints become n, sequences get n items)."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return n
+    if isinstance(value, float):
+        return float(n)
+    if isinstance(value, str):
+        alphabet = value or "a"
+        return "".join(rng.choice(alphabet) for _ in range(n))
+    if isinstance(value, (list, tuple)):
+        items = list(value) or [0]
+        scaled = [copy.deepcopy(rng.choice(items)) for _ in range(n)]
+        return scaled if isinstance(value, list) else tuple(scaled)
+    return value
+
+def scale_args(example, n, seed=0):
+    """Every size-like argument of an example call scaled to n."""
+    rng = random.Random(seed + n)
+    return tuple(scale_value(value, n, rng) for value in example)
+
+
+# --- MEASURING (runs inside a pool worker) ---
+def time_call(function, example, n):
+    """Fastest per-call time (seconds) of function on an input of size n."""
+    number = 1
+    while True:
+        elapsed = timed_loop(function, example, n, number)
+        if elapsed >= MIN_TIMING_SECONDS or number >= 1 << 20:
+            break
+        number *= 2
+    best = elapsed
+    for _ in range(REPEATS - 1):
+        best = min(best, timed_loop(function, example, n, number))
+    return best / number
+
+def timed_loop(function, example, n, number):
+    # Fresh arguments per call (solutions may sort/modify them in place), built before the clock starts
+    calls = [scale_args(example, n) for _ in range(number)]
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for args in calls:
+            function(*args)
+        return time.perf_counter() - start
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+def measure_curve(function, example, max_n=SIZE_MAX):
+    """[[n, seconds_per_call], ...] along the size ladder (stops early when calls get slow or too big)."""
+    curve = []
+    n = SIZE_START
+    while n <= max_n:
+        try:
+            seconds = time_call(function, example, n)
+        except MemoryError:
+            break
+        curve.append([n, seconds])
+        if seconds > SLOW_CALL_SECONDS:
+            break
+        n *= SIZE_FACTOR
+    return curve
+
+def measure(filename, function_name, example, reference_code=None):
+    """
+    Worker task: timing curves of the user's solution and (if given) the
+    reference implementation over the same sizes.
+    example: repr() of the argument tuple (JSON would turn tuples into lists).
+    Returns {"user": curve, "reference": curve or None}.
+    """
+    example = ast.literal_eval(example)
+    module = importlib.import_module(f"{runner.SOLUTIONS_PACKAGE}.{filename.replace('.py', '')}")
+    curves = {"user": measure_curve(getattr(module, function_name), example), "reference": None}
+    if reference_code and curves["user"]:
+        namespace = {"__name__": "reference_solution"}
+        exec(compile(reference_code, "<reference>", "exec"), namespace)
+        curves["reference"] = measure_curve(namespace[function_name], example, max_n=curves["user"][-1][0])
+    return curves
+
+
+# --- ANALYSIS ---
+def fit_slope(curve, points=FIT_POINTS):
+    """Least-squares slope of log(time) against log(n) over the largest sizes."""
+    samples = [(math.log(n), math.log(seconds)) for n, seconds in curve[-points:] if seconds > 0]
+    if len(samples) < 2:
+        return None
+    mean_x = sum(x for x, _ in samples) / len(samples)
+    mean_y = sum(y for _, y in samples) / len(samples)
+    spread = sum((x - mean_x) ** 2 for x, _ in samples)
+    return sum((x - mean_x) * (y - mean_y) for x, y in samples) / spread
+
+def complexity_class(slope):
+    if slope is None:
+        return "unknown"
+    for limit, name in COMPLEXITY_CLASSES:
+        if slope < limit:
+            return name
+    return f"O(n^{round(slope)})"
+
+def compare_curves(slope, curve, reference_slope, reference_curve):
+    """One-line verdict: asymptotically slower, or slower/faster by a constant factor."""
+    if slope is None or reference_slope is None:
+        return "No reference solution to compare against."
+    if slope - reference_slope >= ASYMPTOTIC_MARGIN:
+        return (f"Asymptotically slower than the reference "
+                f"({complexity_class(slope)} vs {complexity_class(reference_slope)}).")
+    if reference_slope - slope >= ASYMPTOTIC_MARGIN:
+        return (f"Asymptotically faster than the reference "
+                f"({complexity_class(slope)} vs {complexity_class(reference_slope)}).")
+
+    # Same class: compare at the largest size both reached
+    reference_times = dict((n, seconds) for n, seconds in reference_curve)
+    common = [(n, seconds) for n, seconds in curve if reference_times.get(n)]
+    if not common:
+        return "Same complexity class as the reference."
+    n, seconds = common[-1]
+    ratio = seconds / reference_times[n]
+    if ratio >= 1.2:
+        return f"Same complexity class, but {ratio:.1f}x slower than the reference (constant factor, n={n})."
+    if ratio <= 1 / 1.2:
+        return f"Same complexity class, and {1 / ratio:.1f}x faster than the reference (n={n})."
+    return f"Same complexity class and speed as the reference (n={n})."
+
+
+# --- ENTRY POINT ---
+def profile_solution(problem_id, pool=None, user_id=None):
+    """
+    Times the user's solution of a problem across growing input sizes,
+    estimates its complexity class and compares it with the reference
+    solution from the quizData. The profile is stored for user_id (default
+    the current profile; background jobs pass the one that started them);
+    profile["earlier"] holds their previous profiles of the problem.
+    Returns (profile, None), or (None, error_message).
+    """
+    problem = db.get_problem(problem_id)
+    if not problem:
+        return None, "Problem not found."
+    _, _, filename, _, test_code, _ = problem
+
+    function_name = find_function_name(test_code)
+    examples = find_examples(test_code, function_name) if function_name else []
+    if not examples:
+        return None, "Could not find example calls of the solution function in the tests."
+    # The largest example is the most representative of "real" input
+    example = max(examples, key=lambda args: sum(scale_weight(value) for value in args))
+
+    reply = (pool or runner.get_pool()).run_task(
+        "complexity", "measure",
+        {"filename": filename, "function_name": function_name, "example": repr(example),
+         "reference_code": ingest.load_reference_solution(problem_id)},
+        limits=PROFILE_LIMITS)
+    if reply["value"] is None:
+        return None, f"{reply['outcome']}: {reply['error']}"
+
+    curve, reference_curve = reply["value"]["user"], reply["value"]["reference"]
+    slope = fit_slope(curve)
+    reference_slope = fit_slope(reference_curve) if reference_curve else None
+    profile = {
+        "function": function_name,
+        "curve": curve,
+        "slope": slope,
+        "complexity": complexity_class(slope),
+        "reference_curve": reference_curve,
+        "reference_slope": reference_slope,
+        "reference_complexity": complexity_class(reference_slope) if reference_curve else None,
+        "verdict": compare_curves(slope, curve, reference_slope, reference_curve),
+    }
+    profile_id = db.save_performance_profile(problem_id, profile, user_id)
+    profile["earlier"] = db.get_performance_profiles(problem_id, EARLIER_PROFILES, before_id=profile_id,
+                                                     user_id=user_id)
+    return profile, None
+
+def scale_weight(value):
+    """How 'big' an example argument is (used to pick the example to scale)."""
+    if isinstance(value, bool):
+        return 0
+    if isinstance(value, (int, float)):
+        return abs(value)
+    if isinstance(value, (str, list, tuple)):
+        return len(value)
+    return 0
+
+def format_profile(profile):
+    """Text report: the timing table, both fitted classes and the verdict."""
+    reference_times = dict((n, s) for n, s in profile["reference_curve"] or [])
+    lines = [f"⏱️  {profile['function']}: {profile['complexity']} (slope {profile['slope'] or 0:.2f})"]
+    if profile["reference_curve"]:
+        lines.append(f"   Reference: {profile['reference_complexity']} (slope {profile['reference_slope'] or 0:.2f})")
+    lines.append(f"   {'n':>7} | {'yours':>10} | {'reference':>10}")
+    for n, seconds in profile["curve"]:
+        reference = f"{reference_times[n] * 1e6:>8.1f}µs" if n in reference_times else f"{'-':>10}"
+        lines.append(f"   {n:>7} | {seconds * 1e6:>8.1f}µs | {reference}")
+    lines.append(f"   {profile['verdict']}")
+    if profile.get("earlier"):
+        lines.append("   Earlier profiles:")
+        lines.extend("   " + format_earlier_profile(row, profile["curve"]) for row in profile["earlier"])
+    return "\n".join(lines)
+
+def format_earlier_profile(row, curve):
+    """One line per stored profile: class, and its time at the largest size the new curve also reached."""
+    _, timestamp, attempt_id, attempt_success, slope, complexity, _, curves = row
+    times = dict((n, seconds) for n, seconds in curves["user"])
+    common = [n for n, _ in curve if n in times] or [n for n, _ in curves["user"][-1:]]
+    timing = f"  n={common[-1]}: {times[common[-1]] * 1e6:.1f}µs" if common else ""
+    attempt = f"  after attempt #{attempt_id} {'✔' if attempt_success else '✘'}" if attempt_id else ""
+    return f"{db.format_timestamp(timestamp)}  {complexity} (slope {slope or 0:.2f}){timing}{attempt}"
+
+
+if __name__ == "__main__":
+    # python complexity.py PROBLEM_ID
+    if len(sys.argv) < 2:
+        print("Usage: python complexity.py PROBLEM_ID")
+        sys.exit(1)
+    db.init_db()
+    profile, error = profile_solution(int(sys.argv[1]))
+    print(format_profile(profile) if profile else f"❌ {error}")
@@ -1,21 +1,211 @@
 import sqlite3
 import datetime
 import os
+import threading
+import time
+import zlib
+import hashlib
+import json
+from contextlib import contextmanager
 
 # The name of the database file
 DB_FILE = "dsa_tracker.db"
 
+# Connection tuning (applied once per long-lived connection)
+BUSY_TIMEOUT_SECONDS = 5.0
+STATEMENT_CACHE_SIZE = 256
+CONNECTION_PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",   # New files only; compact_attempts() converts old ones
+    "PRAGMA journal_mode=WAL",          # Readers don't block the writer (CLI + GUI together)
+    "PRAGMA synchronous=NORMAL",        # Safe with WAL, far fewer fsyncs
+    "PRAGMA cache_size=-16000",         # ~16 MB page cache
+    "PRAGMA mmap_size=268435456",       # Memory-map up to 256 MB of the file
+    "PRAGMA temp_store=MEMORY",
+)
+
+_local = threading.local()
+
+# Write-behind buffers (see attempt_logger.py) register here so readers
+# always see their own pending writes.
+_flush_hooks = []
+
+
+class ManagedConnection(sqlite3.Connection):
+    """
+    A per-thread connection that lives for the whole program.
+    close() is a no-op so older call sites can't tear it down by accident;
+    use close_connection() to really close it.
+    """
+
+    def close(self):
+        pass
+
+    def really_close(self):
+        super().close()
+
+
 def get_connection():
-    """Establishes a connection to the SQLite database."""
-    return sqlite3.connect(DB_FILE)
+    """Returns this thread's long-lived connection to the SQLite database."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.path == DB_FILE:
+        return conn
+    if conn is not None:
+        conn.really_close()  # DB_FILE was changed (e.g. benchmarks)
 
-def init_db():
+    conn = sqlite3.connect(DB_FILE, timeout=BUSY_TIMEOUT_SECONDS, factory=ManagedConnection,
+                           cached_statements=STATEMENT_CACHE_SIZE)
+    # We issue BEGIN/COMMIT ourselves in transaction()
+    conn.isolation_level = None
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    _local.conn, _local.path = conn, DB_FILE
+    return conn
+
+def close_connection():
+    """Closes this thread's connection (it is reopened on next use)."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.really_close()
+        _local.conn = None
+
+def register_flush_hook(flush):
+    """Registers a callable that writes buffered rows to the DB."""
+    if flush not in _flush_hooks:
+        _flush_hooks.append(flush)
+
+def flush_pending_writes():
+    """Flushes every write-behind buffer (call before reading attempts)."""
+    for flush in _flush_hooks:
+        flush()
+
+@contextmanager
+def transaction(immediate=False):
     """
-    Creates the necessary tables if they don't exist.
+    Yields a cursor inside a transaction: commits on success, rolls back on error.
+    immediate=True takes the write lock up front (use for read-then-write logic).
+    Nested calls join the outer transaction.
     """
     conn = get_connection()
-    c = conn.cursor()
-    
+    if conn.in_transaction:
+        yield conn.cursor()
+        return
+
+    conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+    try:
+        yield conn.cursor()
+    except BaseException:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+# Attempts per page of the Mistake Log
+HISTORY_PAGE_SIZE = 50
+
+# compact_attempts(): raw attempts older than this are rolled up per day
+COMPACT_AFTER_DAYS = 90
+
+# Result cache: least recently used entries beyond this are evicted
+RESULT_CACHE_MAX_ENTRIES = 1000
+
+# Profiles: every per-user read/write goes to the current user
+DEFAULT_USER_ID = 1
+DEFAULT_USER_NAME = "default"
+_current_user_id = DEFAULT_USER_ID
+
+# --- TIME HELPERS ---
+# Attempts store integer epoch milliseconds plus day numbers
+# (days since 1970-01-01) in UTC and in local time.
+MS_PER_DAY = 86400000
+EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+def now_ms():
+    """Current time as integer epoch milliseconds."""
+    return time.time_ns() // 1_000_000
+
+def to_ms(moment):
+    """datetime (naive = local time) -> epoch milliseconds."""
+    return int(moment.timestamp() * 1000)
+
+def local_day(ts_ms):
+    """Epoch ms -> local day number."""
+    return datetime.date.fromtimestamp(ts_ms / 1000).toordinal() - EPOCH_ORDINAL
+
+def day_to_date(day):
+    """Day number -> datetime.date."""
+    return datetime.date.fromordinal(day + EPOCH_ORDINAL)
+
+def format_bytes(size):
+    """'1.5 MB' style size."""
+    for unit in ("B", "KB", "MB"):
+        if abs(size) < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+def format_timestamp(ts_ms):
+    """Epoch ms -> 'YYYY-MM-DD HH:MM:SS' in local time ('Never' for None)."""
+    if ts_ms is None:
+        return "Never"
+    return datetime.datetime.fromtimestamp(ts_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+# --- TEXT STORAGE ---
+# Large text (instructions, test code, error messages) is zlib-compressed
+# and stored as a BLOB; short text stays plain TEXT. Readers go through
+# unpack_text(), which tells the two apart by type.
+COMPRESS_THRESHOLD = 1024
+
+def pack_text(text):
+    """str -> value to store (zlib BLOB when large and worth it)."""
+    if text is None or len(text) < COMPRESS_THRESHOLD:
+        return text
+    raw = text.encode('utf-8')
+    packed = zlib.compress(raw, 6)
+    return packed if len(packed) < len(raw) else text
+
+def unpack_text(value):
+    """Stored value -> str (inverse of pack_text)."""
+    if isinstance(value, bytes):
+        return zlib.decompress(value).decode('utf-8')
+    return value
+
+def message_hash(message):
+    return hashlib.sha1(message.encode('utf-8')).hexdigest()
+
+def intern_error_messages(c, messages):
+    """
+    Stores each distinct message once in error_messages.
+    Returns {message: error_id}.
+    """
+    by_hash = {message_hash(m): m for m in set(messages) if m}
+    c.executemany("INSERT OR IGNORE INTO error_messages (hash, body) VALUES (?, ?)",
+                  [(h, pack_text(m)) for h, m in by_hash.items()])
+    ids = {}
+    for h, m in by_hash.items():
+        c.execute("SELECT id FROM error_messages WHERE hash = ?", (h,))
+        ids[m] = c.fetchone()[0]
+    return ids
+
+def delete_orphan_messages(c):
+    """Drops messages no attempt or test case refers to any more."""
+    c.execute('''DELETE FROM error_messages
+                 WHERE id NOT IN (SELECT error_id FROM attempts WHERE error_id IS NOT NULL)
+                   AND id NOT IN (SELECT detail_id FROM attempt_cases WHERE detail_id IS NOT NULL)''')
+
+# --- SCHEMA MIGRATIONS ---
+# Each migration runs exactly once, in order; PRAGMA user_version remembers
+# the last one applied. Never edit a shipped migration, append a new one.
+
+def add_missing_columns(c, table, columns):
+    """Adds each (name, definition) column that the table doesn't have yet."""
+    c.execute(f"PRAGMA table_info({table})")
+    existing = {info[1] for info in c.fetchall()}
+    for name, definition in columns:
+        if name not in existing:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+def migration_1_base_schema(c):
+    """Base tables, plus the columns older databases added ad hoc."""
     # 1. Problems Table
     c.execute('''CREATE TABLE IF NOT EXISTS problems (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -38,15 +228,6 @@ def init_db():
                     FOREIGN KEY(problem_id) REFERENCES problems(id)
                 )''')
 
-    # --- MIGRATION CHECK (Crucial for existing databases) ---
-    # We check if 'time_taken' column exists. If not, we add it.
-    c.execute("PRAGMA table_info(attempts)")
-    columns = [info[1] for info in c.fetchall()]
-    if 'time_taken' not in columns:
-        print("🔧 Updating database... Adding 'time_taken' column.")
-        c.execute("ALTER TABLE attempts ADD COLUMN time_taken REAL DEFAULT 0.0")
-    # --------------------------------------------------------
-
     # 3. User Stats Table
     c.execute('''CREATE TABLE IF NOT EXISTS user_stats (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -61,189 +242,1321 @@ def init_db():
     if c.fetchone()[0] == 0:
         c.execute("INSERT INTO user_stats (total_xp, current_level, streak_days) VALUES (0, 1, 0)")
 
-    conn.commit()
-    conn.close()
+    # 4. File Manifest (lets sync skip HTML files that haven't changed)
+    c.execute('''CREATE TABLE IF NOT EXISTS file_manifest (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER,
+                    mtime REAL,
+                    content_hash TEXT,
+                    title TEXT
+                )''')
+
+    # Databases created before migrations existed may lack these
+    add_missing_columns(c, "attempts", [("time_taken", "REAL DEFAULT 0.0")])
+    add_missing_columns(c, "problems", [
+        ("user_notes", "TEXT DEFAULT ''"),
+        ("source_path", "TEXT"),         # Where each problem came from
+        ("source_member", "TEXT"),       # ...and the member, for archive imports
+        ("source_hash", "TEXT"),
+        ("quiz_offset", "INTEGER"),
+        ("is_retired", "BOOLEAN DEFAULT 0"),
+    ])
+
+def migration_2_attempt_indexes(c):
+    """Secondary indexes so history, XP, review and graph queries stop full-scanning."""
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attempts_problem_time ON attempts(problem_id, timestamp)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attempts_success_time ON attempts(is_success, timestamp)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_problems_filename ON problems(filename)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_file_manifest_title ON file_manifest(title)")
+
+def scope_sql(problem_id_expr, user_id_expr=None):
+    """WHERE condition for one problem (and, once profiles exist, one user)."""
+    if user_id_expr is None:
+        return f"problem_id = {problem_id_expr}"
+    return f"user_id = {user_id_expr} AND problem_id = {problem_id_expr}"
+
+def timed_wins_sql(problem_id_expr, user_id_expr=None):
+    """FROM/WHERE fragment selecting a problem's successful, timed attempts."""
+    return f"attempts WHERE {scope_sql(problem_id_expr, user_id_expr)} AND is_success = 1 AND time_taken > 0"
+
+def median_time_sql(problem_id_expr, rollups=False, user_id_expr=None):
+    """
+    Scalar subquery: median time_taken of a problem's timed wins (walks the index in order).
+    rollups: also count each compacted day's median as one sample.
+    """
+    source = timed_wins_sql(problem_id_expr, user_id_expr)
+    if rollups:
+        source = f"""(SELECT time_taken FROM {source}
+                     UNION ALL
+                     SELECT median_time FROM daily_rollup
+                     WHERE {scope_sql(problem_id_expr, user_id_expr)} AND median_time IS NOT NULL)"""
+    return f"""(SELECT AVG(time_taken) FROM (
+                    SELECT time_taken,
+                           ROW_NUMBER() OVER (ORDER BY time_taken) AS rn,
+                           COUNT(*) OVER () AS cnt
+                    FROM {source})
+                WHERE rn IN ((cnt + 1) / 2, (cnt + 2) / 2))"""
+
+def migration_3_problem_stats(c):
+    """Per-problem stats kept current by triggers, so history screens skip the attempts scan."""
+    c.execute('''CREATE TABLE IF NOT EXISTS problem_stats (
+                    problem_id INTEGER PRIMARY KEY,
+                    wins INTEGER DEFAULT 0,
+                    fails INTEGER DEFAULT 0,
+                    attempt_count INTEGER DEFAULT 0,
+                    last_attempt DATETIME,
+                    best_time REAL,
+                    median_time REAL
+                )''')
+    # Lets best/median be read straight off the index
+    c.execute("CREATE INDEX IF NOT EXISTS idx_attempts_problem_timed ON attempts(problem_id, is_success, time_taken)")
+
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_problem_stats_insert AFTER INSERT ON attempts
+                 BEGIN
+                     INSERT OR IGNORE INTO problem_stats (problem_id) VALUES (NEW.problem_id);
+                     UPDATE problem_stats SET
+                         wins = wins + (CASE WHEN NEW.is_success THEN 1 ELSE 0 END),
+                         fails = fails + (CASE WHEN NEW.is_success THEN 0 ELSE 1 END),
+                         attempt_count = attempt_count + 1,
+                         last_attempt = CASE WHEN last_attempt IS NULL OR NEW.timestamp > last_attempt
+                                             THEN NEW.timestamp ELSE last_attempt END
+                     WHERE problem_id = NEW.problem_id;
+                     UPDATE problem_stats SET
+                         best_time = CASE WHEN best_time IS NULL OR NEW.time_taken < best_time
+                                          THEN NEW.time_taken ELSE best_time END,
+                         median_time = {median_time_sql("NEW.problem_id")}
+                     WHERE problem_id = NEW.problem_id AND NEW.is_success AND NEW.time_taken > 0;
+                 END''')
+
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_problem_stats_delete AFTER DELETE ON attempts
+                 BEGIN
+                     UPDATE problem_stats SET
+                         wins = wins - (CASE WHEN OLD.is_success THEN 1 ELSE 0 END),
+                         fails = fails - (CASE WHEN OLD.is_success THEN 0 ELSE 1 END),
+                         attempt_count = attempt_count - 1,
+                         last_attempt = (SELECT MAX(timestamp) FROM attempts WHERE problem_id = OLD.problem_id)
+                     WHERE problem_id = OLD.problem_id;
+                     UPDATE problem_stats SET
+                         best_time = (SELECT MIN(time_taken) FROM {timed_wins_sql("OLD.problem_id")}),
+                         median_time = {median_time_sql("OLD.problem_id")}
+                     WHERE problem_id = OLD.problem_id AND OLD.is_success AND OLD.time_taken > 0;
+                 END''')
+
+    rebuild_problem_stats(c, timestamp_column="timestamp", rollups=False, per_user=False)
+
+def migration_4_epoch_timestamps(c):
+    """
+    Stores attempt times as integer epoch milliseconds, with the UTC and
+    local day numbers (days since 1970-01-01) precomputed for range scans.
+    """
+    c.execute("DROP TRIGGER IF EXISTS trg_problem_stats_insert")
+    c.execute("DROP TRIGGER IF EXISTS trg_problem_stats_delete")
+
+    c.execute('''CREATE TABLE attempts_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    problem_id INTEGER,
+                    timestamp_ms INTEGER,
+                    utc_day INTEGER,
+                    local_day INTEGER,
+                    is_success BOOLEAN,
+                    error_message TEXT,
+                    time_taken REAL DEFAULT 0.0,
+                    FOREIGN KEY(problem_id) REFERENCES problems(id)
+                )''')
+    # Old rows hold naive local time as ISO text; julianday(x, 'utc') converts local -> UTC
+    c.execute('''INSERT INTO attempts_new
+                     (id, problem_id, timestamp_ms, utc_day, local_day, is_success, error_message, time_taken)
+                 SELECT id, problem_id, ms, ms / 86400000, local_day, is_success, error_message, time_taken
+                 FROM (
+                     SELECT *,
+                            CAST(ROUND((julianday(timestamp, 'utc') - 2440587.5) * 86400000) AS INTEGER) AS ms,
+                            CAST(julianday(date(timestamp)) - 2440587.5 AS INTEGER) AS local_day
+                     FROM attempts
+                 )''')
+    c.execute("DROP TABLE attempts")
+    c.execute("ALTER TABLE attempts_new RENAME TO attempts")
+
+    c.execute("CREATE INDEX idx_attempts_problem_time ON attempts(problem_id, timestamp_ms)")
+    c.execute("CREATE INDEX idx_attempts_success_time ON attempts(is_success, timestamp_ms)")
+    c.execute("CREATE INDEX idx_attempts_success_day ON attempts(is_success, local_day)")
+    c.execute("CREATE INDEX idx_attempts_problem_timed ON attempts(problem_id, is_success, time_taken)")
+
+    # last_attempt becomes epoch ms too
+    c.execute("DROP TABLE problem_stats")
+    c.execute('''CREATE TABLE problem_stats (
+                    problem_id INTEGER PRIMARY KEY,
+                    wins INTEGER DEFAULT 0,
+                    fails INTEGER DEFAULT 0,
+                    attempt_count INTEGER DEFAULT 0,
+                    last_attempt INTEGER,
+                    best_time REAL,
+                    median_time REAL
+                )''')
+    create_problem_stats_triggers(c, rollups=False, per_user=False)
+    rebuild_problem_stats(c, rollups=False, per_user=False)
+
+def migration_5_interned_text(c):
+    """
+    Moves error messages into the interned error_messages table (attempts
+    keep only error_id) and compresses large problem text.
+    """
+    c.execute('''CREATE TABLE IF NOT EXISTS error_messages (
+                    id INTEGER PRIMARY KEY,
+                    hash TEXT UNIQUE,
+                    body BLOB
+                )''')
+    c.execute("SELECT DISTINCT error_message FROM attempts WHERE error_message != ''")
+    ids = intern_error_messages(c, [row[0] for row in c.fetchall()])
+    c.execute("CREATE TEMP TABLE message_ids (message TEXT PRIMARY KEY, error_id INTEGER)")
+    c.executemany("INSERT INTO message_ids VALUES (?, ?)", ids.items())
+
+    c.execute('''CREATE TABLE attempts_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    problem_id INTEGER,
+                    timestamp_ms INTEGER,
+                    utc_day INTEGER,
+                    local_day INTEGER,
+                    is_success BOOLEAN,
+                    error_id INTEGER,
+                    time_taken REAL DEFAULT 0.0,
+                    FOREIGN KEY(problem_id) REFERENCES problems(id),
+                    FOREIGN KEY(error_id) REFERENCES error_messages(id)
+                )''')
+    c.execute('''INSERT INTO attempts_new
+                     (id, problem_id, timestamp_ms, utc_day, local_day, is_success, error_id, time_taken)
+                 SELECT a.id, a.problem_id, a.timestamp_ms, a.utc_day, a.local_day, a.is_success, m.error_id, a.time_taken
+                 FROM attempts a
+                 LEFT JOIN message_ids m ON m.message = a.error_message''')
+    c.execute("DROP TABLE message_ids")
+    c.execute("DROP TABLE attempts")
+    c.execute("ALTER TABLE attempts_new RENAME TO attempts")
+
+    c.execute("CREATE INDEX idx_attempts_problem_time ON attempts(problem_id, timestamp_ms)")
+    c.execute("CREATE INDEX idx_attempts_success_time ON attempts(is_success, timestamp_ms)")
+    c.execute("CREATE INDEX idx_attempts_success_day ON attempts(is_success, local_day)")
+    c.execute("CREATE INDEX idx_attempts_problem_timed ON attempts(problem_id, is_success, time_taken)")
+    create_problem_stats_triggers(c, rollups=False, per_user=False)
+
+    c.execute("SELECT id, instructions, test_code FROM problems")
+    c.executemany("UPDATE problems SET instructions = ?, test_code = ? WHERE id = ?",
+                  [(pack_text(unpack_text(instr)), pack_text(unpack_text(test)), pid)
+                   for pid, instr, test in c.fetchall()])
+
+def migration_6_daily_rollup(c):
+    """
+    Per-problem, per-day summaries of compacted attempts (see compact_attempts),
+    folded into problem_stats by the triggers and rebuild.
+    """
+    c.execute('''CREATE TABLE IF NOT EXISTS daily_rollup (
+                    problem_id INTEGER,
+                    local_day INTEGER,
+                    attempt_count INTEGER,
+                    success_count INTEGER,
+                    timed_count INTEGER,
+                    time_sum REAL,
+                    best_time REAL,
+                    median_time REAL,
+                    p90_time REAL,
+                    last_attempt INTEGER,
+                    PRIMARY KEY (problem_id, local_day)
+                )''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_daily_rollup_day ON daily_rollup(local_day)")
+    c.execute("DROP TRIGGER IF EXISTS trg_problem_stats_insert")
+    c.execute("DROP TRIGGER IF EXISTS trg_problem_stats_delete")
+    create_problem_stats_triggers(c, per_user=False)
+
+def migration_7_profiles(c):
+    """
+    Several people in one database: a users table, and user_id on attempts,
+    stats, rollups, XP and solve state/notes (user_problems). The problem
+    bank stays shared. Existing data becomes the default user's.
+    """
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY,
+                    name TEXT UNIQUE,
+                    created_ms INTEGER
+                )''')
+    c.execute("INSERT OR IGNORE INTO users (id, name, created_ms) VALUES (?, ?, ?)",
+              (DEFAULT_USER_ID, DEFAULT_USER_NAME, now_ms()))
+
+    # XP: one user_stats row per user
+    add_missing_columns(c, "user_stats", [("user_id", "INTEGER")])
+    c.execute("DELETE FROM user_stats WHERE id <> (SELECT MIN(id) FROM user_stats)")
+    c.execute("UPDATE user_stats SET user_id = ?", (DEFAULT_USER_ID,))
+    c.execute("CREATE UNIQUE INDEX idx_user_stats_user ON user_stats(user_id)")
+
+    # Solve state and notes per user (problems.is_solved / user_notes are no longer used)
+    c.execute('''CREATE TABLE user_problems (
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    is_solved BOOLEAN DEFAULT 0,
+                    user_notes TEXT DEFAULT '',
+                    PRIMARY KEY (user_id, problem_id)
+                ) WITHOUT ROWID''')
+    c.execute('''INSERT INTO user_problems (user_id, problem_id, is_solved, user_notes)
+                 SELECT ?, id, is_solved, COALESCE(user_notes, '') FROM problems
+                 WHERE is_solved OR COALESCE(user_notes, '') <> ''
+              ''', (DEFAULT_USER_ID,))
+
+    # Attempts: user_id leads every index, so per-user queries are range scans
+    c.execute(f"ALTER TABLE attempts ADD COLUMN user_id INTEGER NOT NULL DEFAULT {DEFAULT_USER_ID}")
+    for index in ("idx_attempts_problem_time", "idx_attempts_success_time",
+                  "idx_attempts_success_day", "idx_attempts_problem_timed"):
+        c.execute(f"DROP INDEX IF EXISTS {index}")
+    c.execute("CREATE INDEX idx_attempts_user_problem_time ON attempts(user_id, problem_id, timestamp_ms)")
+    c.execute("CREATE INDEX idx_attempts_user_success_day ON attempts(user_id, is_success, local_day)")
+    c.execute("CREATE INDEX idx_attempts_user_problem_timed ON attempts(user_id, problem_id, is_success, time_taken)")
+
+    c.execute("ALTER TABLE daily_rollup RENAME TO daily_rollup_old")
+    c.execute('''CREATE TABLE daily_rollup (
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    local_day INTEGER,
+                    attempt_count INTEGER,
+                    success_count INTEGER,
+                    timed_count INTEGER,
+                    time_sum REAL,
+                    best_time REAL,
+                    median_time REAL,
+                    p90_time REAL,
+                    last_attempt INTEGER,
+                    PRIMARY KEY (user_id, problem_id, local_day)
+                )''')
+    c.execute("INSERT INTO daily_rollup SELECT ?, * FROM daily_rollup_old", (DEFAULT_USER_ID,))
+    c.execute("DROP TABLE daily_rollup_old")
+    c.execute("CREATE INDEX idx_daily_rollup_user_day ON daily_rollup(user_id, local_day)")
+
+    c.execute("DROP TRIGGER IF EXISTS trg_problem_stats_insert")
+    c.execute("DROP TRIGGER IF EXISTS trg_problem_stats_delete")
+    c.execute("DROP TABLE problem_stats")
+    c.execute('''CREATE TABLE problem_stats (
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    wins INTEGER DEFAULT 0,
+                    fails INTEGER DEFAULT 0,
+                    attempt_count INTEGER DEFAULT 0,
+                    last_attempt INTEGER,
+                    best_time REAL,
+                    median_time REAL,
+                    PRIMARY KEY (user_id, problem_id)
+                )''')
+    # Review queue: a user's problems by last attempt
+    c.execute("CREATE INDEX idx_problem_stats_user_last ON problem_stats(user_id, last_attempt)")
+    create_problem_stats_triggers(c)
+    rebuild_problem_stats(c)
+
+def migration_8_attempt_cases(c):
+    """
+    One row per test case per attempt (name, status, duration, failure detail).
+    user_id/problem_id are copied from the attempt so "most failed cases"
+    is a range scan of one index instead of a join over every attempt.
+    """
+    c.execute('''CREATE TABLE attempt_cases (
+                    attempt_id INTEGER,
+                    name TEXT,
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    status TEXT,
+                    duration REAL,
+                    detail_id INTEGER REFERENCES error_messages(id),
+                    PRIMARY KEY (attempt_id, name)
+                ) WITHOUT ROWID''')
+    c.execute("CREATE INDEX idx_attempt_cases_user_status ON attempt_cases(user_id, status, problem_id, name)")
+
+def migration_9_result_cache(c):
+    """
+    Test results keyed by (solution source hash, test code hash, Python
+    version), so re-running unchanged code is a lookup. attempts.cached
+    marks attempts that were answered from it.
+    """
+    c.execute('''CREATE TABLE result_cache (
+                    source_hash TEXT,
+                    test_hash TEXT,
+                    python_version TEXT,
+                    result BLOB,
+                    created_ms INTEGER,
+                    last_used_ms INTEGER,
+                    hits INTEGER DEFAULT 0,
+                    PRIMARY KEY (source_hash, test_hash, python_version)
+                )''')
+    c.execute("CREATE INDEX idx_result_cache_last_used ON result_cache(last_used_ms)")
+    c.execute("ALTER TABLE attempts ADD COLUMN cached BOOLEAN NOT NULL DEFAULT 0")
+
+def migration_10_attempt_outcomes(c):
+    """
+    attempts.outcome: PASS, FAIL, TIMEOUT, MEMORY-LIMIT or CRASH (see
+    test_runner). Older attempts only know success or failure.
+    """
+    c.execute("ALTER TABLE attempts ADD COLUMN outcome TEXT")
+    c.execute("UPDATE attempts SET outcome = CASE WHEN is_success THEN 'PASS' ELSE 'FAIL' END")
+
+def migration_11_performance_profiles(c):
+    """
+    One row per complexity profile of a solution: the fitted log-log slope
+    and class for the user's code and the reference, plus the timing curves.
+    """
+    c.execute('''CREATE TABLE performance_profiles (
+                    id INTEGER PRIMARY KEY,
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    timestamp_ms INTEGER,
+                    slope REAL,
+                    complexity TEXT,
+                    reference_slope REAL,
+                    reference_complexity TEXT,
+                    verdict TEXT,
+                    curves BLOB
+                )''')
+    c.execute('''CREATE INDEX idx_performance_profiles_user_problem_time
+                 ON performance_profiles(user_id, problem_id, timestamp_ms)''')
+
+def migration_12_attempt_memory(c):
+    """
+    Memory profile of an attempt (peak traced bytes, max RSS, live blocks and
+    the top allocation sites), for attempts run with memory profiling on.
+    """
+    c.execute('''CREATE TABLE attempt_memory (
+                    attempt_id INTEGER PRIMARY KEY,
+                    user_id INTEGER,
+                    problem_id INTEGER,
+                    peak_bytes INTEGER,
+                    max_rss_kb INTEGER,
+                    alloc_blocks INTEGER,
+                    alloc_bytes INTEGER,
+                    top_sites BLOB
+                )''')
+    c.execute("CREATE INDEX idx_attempt_memory_user_problem ON attempt_memory(user_id, problem_id, attempt_id)")
+
+def migration_13_reference_solutions(c):
+    """
+    The full reference implementation from the quizData (compressed like the
+    other problem text). Problems ingested earlier get it on their next sync.
+    """
+    c.execute("ALTER TABLE problems ADD COLUMN reference_solution BLOB")
+
+def migration_14_profile_attempts(c):
+    """
+    Links a performance profile to the attempt it followed (the user's
+    latest test run of that problem), so profiles can be shown in history.
+    """
+    c.execute("ALTER TABLE performance_profiles ADD COLUMN attempt_id INTEGER")
+
+def create_problem_stats_triggers(c, rollups=True, per_user=True):
+    """
+    (Re)creates the triggers that keep problem_stats in step with attempts.
+    rollups=False / per_user=False build the versions older migrations used.
+    """
+    new_user = "NEW.user_id" if per_user else None
+    old_user = "OLD.user_id" if per_user else None
+    new_scope = scope_sql("NEW.problem_id", new_user)
+    old_scope = scope_sql("OLD.problem_id", old_user)
+    new_key = "(user_id, problem_id) VALUES (NEW.user_id, NEW.problem_id)" if per_user else "(problem_id) VALUES (NEW.problem_id)"
+
+    last_attempt = f"(SELECT MAX(timestamp_ms) FROM attempts WHERE {old_scope})"
+    best_time = f"(SELECT MIN(time_taken) FROM {timed_wins_sql('OLD.problem_id', old_user)})"
+    if rollups:
+        # Rolled-up days are always older than the raw rows that remain
+        last_attempt = f"""COALESCE({last_attempt},
+                           (SELECT MAX(last_attempt) FROM daily_rollup WHERE {old_scope}))"""
+        best_time = f"""(SELECT MIN(t) FROM (
+                            SELECT {best_time} AS t
+                            UNION ALL
+                            SELECT MIN(best_time) FROM daily_rollup WHERE {old_scope}))"""
+
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_problem_stats_insert AFTER INSERT ON attempts
+                 BEGIN
+                     INSERT OR IGNORE INTO problem_stats {new_key};
+                     UPDATE problem_stats SET
+                         wins = wins + (CASE WHEN NEW.is_success THEN 1 ELSE 0 END),
+                         fails = fails + (CASE WHEN NEW.is_success THEN 0 ELSE 1 END),
+                         attempt_count = attempt_count + 1,
+                         last_attempt = MAX(COALESCE(last_attempt, NEW.timestamp_ms), NEW.timestamp_ms)
+                     WHERE {new_scope};
+                     UPDATE problem_stats SET
+                         best_time = CASE WHEN best_time IS NULL OR NEW.time_taken < best_time
+                                          THEN NEW.time_taken ELSE best_time END,
+                         median_time = {median_time_sql("NEW.problem_id", rollups, new_user)}
+                     WHERE {new_scope} AND NEW.is_success AND NEW.time_taken > 0;
+                 END''')
+
+    c.execute(f'''CREATE TRIGGER IF NOT EXISTS trg_problem_stats_delete AFTER DELETE ON attempts
+                 BEGIN
+                     UPDATE problem_stats SET
+                         wins = wins - (CASE WHEN OLD.is_success THEN 1 ELSE 0 END),
+                         fails = fails - (CASE WHEN OLD.is_success THEN 0 ELSE 1 END),
+                         attempt_count = attempt_count - 1,
+                         last_attempt = {last_attempt}
+                     WHERE {old_scope};
+                     UPDATE problem_stats SET
+                         best_time = {best_time},
+                         median_time = {median_time_sql("OLD.problem_id", rollups, old_user)}
+                     WHERE {old_scope} AND OLD.is_success AND OLD.time_taken > 0;
+                 END''')
+
+def rebuild_problem_stats(c=None, timestamp_column="timestamp_ms", rollups=True, per_user=True):
+    """
+    Recomputes problem_stats from scratch (one-shot repair; the triggers
+    keep it current afterwards). Compacted days come from daily_rollup.
+    """
+    if c is None:
+        with transaction(immediate=True) as c:
+            return rebuild_problem_stats(c, timestamp_column, rollups, per_user)
+
+    key = "user_id, problem_id" if per_user else "problem_id"
+    join = "m.user_id = t.user_id AND m.problem_id = t.problem_id" if per_user else "m.problem_id = t.problem_id"
+    timed = f"SELECT {key}, time_taken FROM attempts WHERE is_success = 1 AND time_taken > 0"
+    totals = f"""SELECT {key},
+                        SUM(CASE WHEN is_success THEN 1 ELSE 0 END) AS wins,
+                        SUM(CASE WHEN is_success THEN 0 ELSE 1 END) AS fails,
+                        COUNT(*) AS attempt_count,
+                        MAX({timestamp_column}) AS last_attempt,
+                        MIN(CASE WHEN is_success AND time_taken > 0 THEN time_taken END) AS best_time
+                 FROM attempts GROUP BY {key}"""
+    if rollups:
+        timed += f""" UNION ALL
+                      SELECT {key}, median_time FROM daily_rollup WHERE median_time IS NOT NULL"""
+        totals += f""" UNION ALL
+                       SELECT {key}, success_count, attempt_count - success_count,
+                              attempt_count, last_attempt, best_time
+                       FROM daily_rollup"""
+
+    c.execute("DELETE FROM problem_stats")
+    c.execute(f'''WITH ranked AS (
+                     SELECT {key}, time_taken,
+                            ROW_NUMBER() OVER (PARTITION BY {key} ORDER BY time_taken) AS rn,
+                            COUNT(*) OVER (PARTITION BY {key}) AS cnt
+                     FROM ({timed})
+                 ),
+                 medians AS (
+                     SELECT {key}, AVG(time_taken) AS median_time
+                     FROM ranked
+                     WHERE rn IN ((cnt + 1) / 2, (cnt + 2) / 2)
+                     GROUP BY {key}
+                 )
+                 INSERT INTO problem_stats
+                     ({key}, wins, fails, attempt_count, last_attempt, best_time, median_time)
+                 SELECT
+                     {", ".join("t." + k for k in key.split(", "))},
+                     SUM(t.wins),
+                     SUM(t.fails),
+                     SUM(t.attempt_count),
+                     MAX(t.last_attempt),
+                     MIN(t.best_time),
+                     m.median_time
+                 FROM ({totals}) t
+                 LEFT JOIN medians m ON {join}
+                 GROUP BY {", ".join("t." + k for k in key.split(", "))}''')
+
+MIGRATIONS = [
+    (1, "Creating base schema", migration_1_base_schema),
+    (2, "Adding attempt indexes", migration_2_attempt_indexes),
+    (3, "Building per-problem stats", migration_3_problem_stats),
+    (4, "Converting attempt times to epoch milliseconds", migration_4_epoch_timestamps),
+    (5, "Interning error messages and compressing problem text", migration_5_interned_text),
+    (6, "Adding daily rollups", migration_6_daily_rollup),
+    (7, "Adding user profiles", migration_7_profiles),
+    (8, "Adding per-test-case results", migration_8_attempt_cases),
+    (9, "Adding the test result cache", migration_9_result_cache),
+    (10, "Recording attempt outcomes", migration_10_attempt_outcomes),
+    (11, "Adding performance profiles", migration_11_performance_profiles),
+    (12, "Adding attempt memory profiles", migration_12_attempt_memory),
+    (13, "Storing reference solutions", migration_13_reference_solutions),
+    (14, "Linking performance profiles to attempts", migration_14_profile_attempts),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version():
+    """Returns the number of the last migration applied to the DB."""
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+def init_db():
+    """
+    Brings the schema up to date by applying any pending migrations.
+    On a current database this is a single PRAGMA read.
+    """
+    version = get_schema_version()
+    if version >= SCHEMA_VERSION:
+        return
+
+    for number, description, migrate in MIGRATIONS:
+        if number <= version:
+            continue
+        with transaction(immediate=True) as c:
+            # Another process (CLI + GUI) may have migrated while we waited for the lock
+            c.execute("PRAGMA user_version")
+            if c.fetchone()[0] >= number:
+                continue
+            if version > 0:
+                print(f"🔧 Updating database... {description} (v{number})")
+            migrate(c)
+            c.execute(f"PRAGMA user_version = {number}")
+
+# --- PROFILES ---
+def get_current_user():
+    """Returns the id of the profile all per-user reads and writes use."""
+    return _current_user_id
+
+def set_current_user(user_id):
+    """Switches the active profile (buffered attempts keep the user they were logged for)."""
+    global _current_user_id
+    _current_user_id = user_id
+
+def get_users():
+    """Returns (id, name) for every profile."""
+    with transaction() as c:
+        c.execute("SELECT id, name FROM users ORDER BY name")
+        return c.fetchall()
+
+def get_or_create_user(name):
+    """Returns the id of the profile called 'name', creating it if needed."""
+    with transaction(immediate=True) as c:
+        c.execute("INSERT OR IGNORE INTO users (name, created_ms) VALUES (?, ?)", (name, now_ms()))
+        c.execute("SELECT id FROM users WHERE name = ?", (name,))
+        return c.fetchone()[0]
 
 def get_user_stats():
     """Returns the user's current stats (XP, Level, Streak)."""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("SELECT total_xp, current_level, streak_days FROM user_stats LIMIT 1")
-    stats = c.fetchone()
-    conn.close()
-    return stats
-
-def update_xp(amount):
-    """Adds XP and checks for level up."""
-    conn = get_connection()
-    c = conn.cursor()
-    
-    c.execute("SELECT total_xp, current_level FROM user_stats LIMIT 1")
-    result = c.fetchone()
-    
-    if not result:
-        c.execute("INSERT INTO user_stats (total_xp, current_level, streak_days) VALUES (0, 1, 0)")
-        xp, level = 0, 1
-    else:
-        xp, level = result
-    
-    new_xp = xp + amount
-    new_level = (new_xp // 100) + 1
-    
-    c.execute("UPDATE user_stats SET total_xp = ?, current_level = ?", (new_xp, new_level))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("SELECT total_xp, current_level, streak_days FROM user_stats WHERE user_id = ?",
+                  (_current_user_id,))
+        return c.fetchone() or (0, 1, 0)
+
+def update_xp(amount, user_id=None):
+    """Adds XP (to user_id, default the current profile) and checks for level up."""
+    user_id = _current_user_id if user_id is None else user_id
+    with transaction(immediate=True) as c:
+        c.execute("SELECT total_xp, current_level FROM user_stats WHERE user_id = ?", (user_id,))
+        result = c.fetchone()
+        
+        if not result:
+            c.execute("INSERT INTO user_stats (user_id, total_xp, current_level, streak_days) VALUES (?, 0, 1, 0)",
+                      (user_id,))
+            xp, level = 0, 1
+        else:
+            xp, level = result
+        
+        new_xp = xp + amount
+        new_level = (new_xp // 100) + 1
+        
+        c.execute("UPDATE user_stats SET total_xp = ?, current_level = ? WHERE user_id = ?",
+                  (new_xp, new_level, user_id))
     
     return (new_level > level), new_level, new_xp
 
-def upsert_problem(title, filename, instructions, solution_stub, test_code):
+def upsert_problem(title, filename, instructions, solution_stub, test_code, reference_solution=None):
     """Inserts a new problem or updates it if it already exists."""
-    conn = get_connection()
-    c = conn.cursor()
-    
+    instructions, test_code = pack_text(instructions), pack_text(test_code)
+    reference_solution = pack_text(reference_solution) if reference_solution else None
     try:
-        c.execute('''INSERT OR IGNORE INTO problems (title, filename, instructions, solution_stub, test_code) 
-                     VALUES (?, ?, ?, ?, ?)''', 
-                     (title, filename, instructions, solution_stub, test_code))
-        
-        c.execute('''UPDATE problems 
-                     SET instructions=?, solution_stub=?, test_code=?
-                     WHERE title=?''', 
-                     (instructions, solution_stub, test_code, title))
-        conn.commit()
+        with transaction() as c:
+            c.execute('''INSERT OR IGNORE INTO problems (title, filename, instructions, solution_stub, test_code) 
+                         VALUES (?, ?, ?, ?, ?)''', 
+                         (title, filename, instructions, solution_stub, test_code))
+            
+            c.execute('''UPDATE problems 
+                         SET instructions=?, solution_stub=?, test_code=?, reference_solution=?
+                         WHERE title=?''', 
+                         (instructions, solution_stub, test_code, reference_solution, title))
     except Exception as e:
         print(f"❌ Error syncing problem '{title}': {e}")
-    finally:
-        conn.close()
 
-def log_attempt(problem_id, is_success, error_message="", time_taken=0.0):
+def get_problem(problem_id):
+    """Returns (title, instructions, filename, solution_stub, test_code, is_solved) or None."""
+    flush_pending_writes()  # is_solved may still be sitting in the attempt buffer
+    with transaction() as c:
+        c.execute('''SELECT p.title, p.instructions, p.filename, p.solution_stub, p.test_code,
+                            COALESCE(up.is_solved, 0)
+                     FROM problems p
+                     LEFT JOIN user_problems up ON up.user_id = ? AND up.problem_id = p.id
+                     WHERE p.id = ?''', (_current_user_id, problem_id))
+        row = c.fetchone()
+    if not row:
+        return None
+    title, instructions, filename, stub, test_code, is_solved = row
+    return (title, unpack_text(instructions), filename, stub, unpack_text(test_code), is_solved)
+
+def get_reference_solution(problem_id):
+    """Returns the stored reference implementation of a problem, or None (not ingested since v13)."""
+    with transaction() as c:
+        c.execute("SELECT reference_solution FROM problems WHERE id = ?", (problem_id,))
+        row = c.fetchone()
+    return unpack_text(row[0]) if row and row[0] is not None else None
+
+def save_reference_solution(problem_id, reference_solution):
+    with transaction() as c:
+        c.execute("UPDATE problems SET reference_solution = ? WHERE id = ?",
+                  (pack_text(reference_solution), problem_id))
+
+def get_file_manifest():
+    """Returns {path: (size, mtime, content_hash, title)} for every ingested HTML file."""
+    with transaction() as c:
+        c.execute("SELECT path, size, mtime, content_hash, title FROM file_manifest")
+        return {row[0]: row[1:] for row in c.fetchall()}
+
+def get_problem_source(problem_id):
+    """
+    Returns (source_path, source_member, source_hash, quiz_offset) for a problem,
+    or None if we don't know where it came from.
+    """
+    with transaction() as c:
+        c.execute("SELECT title, source_path, source_member, source_hash, quiz_offset FROM problems WHERE id = ?", (problem_id,))
+        row = c.fetchone()
+        if row and row[1]:
+            return row[1:]
+        if row:
+            # Problems ingested before sources were recorded: fall back to the manifest
+            c.execute("SELECT path, content_hash FROM file_manifest WHERE title = ?", (row[0],))
+            entry = c.fetchone()
+            if entry:
+                return (entry[0], None, entry[1], None)
+    return None
+
+def find_problem_by_filename(py_filename):
+    """Returns (id, title, source_path) of the problem using this solution file, or None."""
+    with transaction() as c:
+        c.execute("SELECT id, title, source_path FROM problems WHERE filename = ?", (py_filename,))
+        return c.fetchone()
+
+def remove_manifest_entries(paths):
+    """Forgets HTML files that no longer exist on disk."""
+    if not paths:
+        return
+    with transaction() as c:
+        c.executemany("DELETE FROM file_manifest WHERE path = ?", [(p,) for p in paths])
+
+def bulk_upsert_problems(rows, manifest_entries=(), sources=()):
+    """
+    Inserts/updates many problems (and their file manifest entries) in a
+    single transaction.
+    rows: list of (title, filename, instructions, solution_stub, test_code, reference_solution) tuples.
+    sources: optional list of (source_path, source_member, source_hash, quiz_offset, title) tuples.
+    """
+    if not rows and not manifest_entries:
+        return
+    rows = [(title, filename, pack_text(instr), stub, pack_text(test), pack_text(ref) if ref else None)
+            for title, filename, instr, stub, test, ref in rows]
+    
+    try:
+        with transaction(immediate=True) as c:
+            c.executemany('''INSERT OR IGNORE INTO problems (title, filename, instructions, solution_stub, test_code) 
+                             VALUES (?, ?, ?, ?, ?)''', [row[:5] for row in rows])
+            
+            c.executemany('''UPDATE problems 
+                             SET instructions=?, solution_stub=?, test_code=?, reference_solution=?, is_retired=0
+                             WHERE title=?''', 
+                             [(instr, stub, test, ref, title) for title, _, instr, stub, test, ref in rows])
+            
+            c.executemany('''UPDATE problems 
+                             SET source_path=?, source_member=?, source_hash=?, quiz_offset=?
+                             WHERE title=?''', sources)
+            
+            c.executemany('''INSERT OR REPLACE INTO file_manifest (path, size, mtime, content_hash, title)
+                             VALUES (?, ?, ?, ?, ?)''', manifest_entries)
+    except Exception as e:
+        print(f"❌ Error syncing {len(rows)} problems: {e}")
+
+def retire_problems(titles):
+    """Hides problems whose question file is gone (their history is kept)."""
+    if not titles:
+        return
+    with transaction() as c:
+        c.executemany("UPDATE problems SET is_retired = 1 WHERE title = ?", [(t,) for t in titles])
+
+def get_problems_by_title(titles):
+    """Returns (id, title, is_solved) rows for the given titles."""
+    if not titles:
+        return []
+    placeholders = ",".join("?" * len(titles))
+    with transaction() as c:
+        c.execute(f'''SELECT p.id, p.title, COALESCE(up.is_solved, 0)
+                      FROM problems p
+                      LEFT JOIN user_problems up ON up.user_id = ? AND up.problem_id = p.id
+                      WHERE p.title IN ({placeholders})''', [_current_user_id] + list(titles))
+        return c.fetchall()
+
+def get_dashboard_problems():
+    """Returns (id, title, filename, is_solved) for every active problem, for the current user."""
+    flush_pending_writes()  # is_solved may still be sitting in the attempt buffer
+    with transaction() as c:
+        c.execute('''SELECT p.id, p.title, p.filename, COALESCE(up.is_solved, 0)
+                     FROM problems p
+                     LEFT JOIN user_problems up ON up.user_id = ? AND up.problem_id = p.id
+                     WHERE p.is_retired = 0''', (_current_user_id,))
+        return c.fetchall()
+
+def get_problem_tests():
+    """Returns (id, title, filename, test_code) for every active problem (batch grading)."""
+    with transaction() as c:
+        c.execute("SELECT id, title, filename, test_code FROM problems WHERE is_retired = 0 ORDER BY id")
+        return [(pid, title, filename, unpack_text(test_code)) for pid, title, filename, test_code in c.fetchall()]
+
+def set_solved_states(states):
+    """
+    Sets the current user's solved flag per problem (a regrade can also un-solve).
+    states: list of (problem_id, is_solved) tuples.
+    """
+    with transaction() as c:
+        c.executemany('''INSERT INTO user_problems (user_id, problem_id, is_solved) VALUES (?, ?, ?)
+                         ON CONFLICT (user_id, problem_id) DO UPDATE SET is_solved = excluded.is_solved''',
+                      [(_current_user_id, pid, 1 if ok else 0) for pid, ok in states])
+
+def log_attempt(problem_id, is_success, error_message="", time_taken=0.0, cases=None, cached=False, outcome=None,
+                memory=None, user_id=None):
     """
     Records a user's attempt at solving a problem.
     (UPDATED to accept time_taken)
+    cases: optional per-test-case records from the test runner.
+    cached: the result came from the result cache.
+    outcome: the runner's outcome (default PASS/FAIL from is_success).
+    memory: optional memory profile of the run (test_runner.MemoryProbe).
+    user_id: the profile that made the attempt (default the current one).
     """
-    conn = get_connection()
-    c = conn.cursor()
-    
-    timestamp = datetime.datetime.now()
-    
-    c.execute("INSERT INTO attempts (problem_id, timestamp, is_success, error_message, time_taken) VALUES (?, ?, ?, ?, ?)",
-              (problem_id, timestamp, is_success, error_message, time_taken))
+    log_attempts([(problem_id, now_ms(), is_success, error_message, time_taken,
+                   _current_user_id if user_id is None else user_id, cases, cached, outcome, memory)])
+
+def log_attempts(attempts):
+    """
+    Records many attempts in one transaction and marks solved problems.
+    attempts: list of (problem_id, timestamp_ms, is_success, error_message, time_taken, user_id
+    [, cases[, cached[, outcome[, memory]]]]) tuples; cases is a list of
+    {"name", "status", "duration", "detail"} dicts (or None), memory a memory profile dict (or None).
+    """
+    if not attempts:
+        return
+    solved = {(a[5], a[0]) for a in attempts if a[2]}
+    details = [case["detail"] for a in attempts if len(a) > 6 and a[6] for case in a[6]]
     
-    if is_success:
-        c.execute("UPDATE problems SET is_solved = 1 WHERE id = ?", (problem_id,))
-        
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        error_ids = intern_error_messages(c, [a[3] for a in attempts] + details)
+        insert = '''INSERT INTO attempts
+                        (user_id, problem_id, timestamp_ms, utc_day, local_day, is_success, error_id, time_taken,
+                         cached, outcome)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+        rows = []
+        for pid, ts, ok, msg, taken, user_id, *rest in attempts:
+            cases = rest[0] if rest else None
+            cached = bool(rest[1]) if len(rest) > 1 else False
+            outcome = (rest[2] if len(rest) > 2 else None) or ("PASS" if ok else "FAIL")
+            memory = rest[3] if len(rest) > 3 else None
+            row = (user_id, pid, ts, ts // MS_PER_DAY, local_day(ts), ok, error_ids.get(msg), taken, cached, outcome)
+            if not cases and not memory:
+                rows.append(row)
+                continue
+            # Attempts with test cases/memory need their id, so they are inserted one by one
+            attempt_id = c.execute(insert, row).lastrowid
+            c.executemany('''INSERT OR IGNORE INTO attempt_cases
+                                 (attempt_id, name, user_id, problem_id, status, duration, detail_id)
+                             VALUES (?, ?, ?, ?, ?, ?, ?)''',
+                          [(attempt_id, case["name"], user_id, pid, case["status"], case["duration"],
+                            error_ids.get(case["detail"])) for case in cases or ()])
+            if memory:
+                c.execute('''INSERT INTO attempt_memory
+                                 (attempt_id, user_id, problem_id, peak_bytes, max_rss_kb, alloc_blocks, alloc_bytes,
+                                  top_sites)
+                             VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                          (attempt_id, user_id, pid, memory["peak_bytes"], memory["max_rss_kb"],
+                           memory["alloc_blocks"], memory["alloc_bytes"], pack_text(json.dumps(memory["top_sites"]))))
+        c.executemany(insert, rows)
+        c.executemany('''INSERT INTO user_problems (user_id, problem_id, is_solved) VALUES (?, ?, 1)
+                         ON CONFLICT (user_id, problem_id) DO UPDATE SET is_solved = 1''', solved)
 
 def get_problem_history(problem_id):
-    """Fetches the full history of attempts for a specific problem."""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("""
-        SELECT timestamp, is_success, error_message
-        FROM attempts
-        WHERE problem_id = ?
-        ORDER BY timestamp DESC
-    """, (problem_id,))
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    """
+    Fetches the full history of attempts for a specific problem.
+    (Prefer get_problem_history_page for display and get_problem_stats for counts.)
+    Only raw attempts are listed; compacted days live in daily_rollup.
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute("""
+            SELECT a.timestamp_ms, a.is_success, e.body
+            FROM attempts a
+            LEFT JOIN error_messages e ON e.id = a.error_id
+            WHERE a.user_id = ? AND a.problem_id = ?
+            ORDER BY a.timestamp_ms DESC
+        """, (_current_user_id, problem_id))
+        return [(ts, ok, unpack_text(body)) for ts, ok, body in c.fetchall()]
 
-def get_global_stats():
-    """Calculates the total successes and failures for every problem."""
-    conn = get_connection()
-    c = conn.cursor()
+def get_problem_history_page(problem_id, before=None, limit=HISTORY_PAGE_SIZE):
+    """
+    One page of a problem's attempts, newest first (keyset pagination on
+    idx_attempts_user_problem_time, so every page costs the same).
+    before: the cursor returned for the previous page (None = first page).
+    Returns (rows, next_cursor); rows are (timestamp_ms, is_success, error_message,
+    peak_bytes, attempt_id) with peak_bytes None unless the run was memory-profiled
+    (attempt_id: for get_attempt_cases), and next_cursor is None after the last page.
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        if before is None:
+            c.execute("""
+                SELECT a.timestamp_ms, a.is_success, e.body, a.id, m.peak_bytes
+                FROM attempts a
+                LEFT JOIN error_messages e ON e.id = a.error_id
+                LEFT JOIN attempt_memory m ON m.attempt_id = a.id
+                WHERE a.user_id = ? AND a.problem_id = ?
+                ORDER BY a.timestamp_ms DESC, a.id DESC
+                LIMIT ?
+            """, (_current_user_id, problem_id, limit + 1))
+        else:
+            c.execute("""
+                SELECT a.timestamp_ms, a.is_success, e.body, a.id, m.peak_bytes
+                FROM attempts a
+                LEFT JOIN error_messages e ON e.id = a.error_id
+                LEFT JOIN attempt_memory m ON m.attempt_id = a.id
+                WHERE a.user_id = ? AND a.problem_id = ? AND (a.timestamp_ms, a.id) < (?, ?)
+                ORDER BY a.timestamp_ms DESC, a.id DESC
+                LIMIT ?
+            """, (_current_user_id, problem_id, before[0], before[1], limit + 1))
+        rows = c.fetchall()
     
+    # The extra row only tells us whether another page exists
+    page = rows[:limit]
+    next_cursor = (page[-1][0], page[-1][3]) if len(rows) > limit else None
+    return [(ts, ok, unpack_text(body), peak, attempt_id) for ts, ok, body, attempt_id, peak in page], next_cursor
+
+def count_logged_attempts(problem_id):
+    """How many raw attempts get_problem_history_page can list (compacted days excluded)."""
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute("SELECT COUNT(*) FROM attempts WHERE user_id = ? AND problem_id = ?",
+                  (_current_user_id, problem_id))
+        return c.fetchone()[0]
+
+def get_memory_trend(problem_id, limit=10):
+    """
+    The current user's last 'limit' memory-profiled attempts at a problem, oldest first:
+    [(timestamp_ms, is_success, peak_bytes, max_rss_kb, alloc_blocks, top_sites)].
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute('''SELECT a.timestamp_ms, a.is_success, m.peak_bytes, m.max_rss_kb, m.alloc_blocks, m.top_sites
+                     FROM attempt_memory m
+                     JOIN attempts a ON a.id = m.attempt_id
+                     WHERE m.user_id = ? AND m.problem_id = ?
+                     ORDER BY m.attempt_id DESC
+                     LIMIT ?''', (_current_user_id, problem_id, limit))
+        rows = c.fetchall()
+    return [row[:5] + (json.loads(unpack_text(row[5])),) for row in reversed(rows)]
+
+def get_memory_trends(points=3):
+    """
+    Peak memory of the current user's last 'points' memory-profiled attempts
+    at every problem, oldest first: {title: [peak_bytes, ...]} (History views).
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute('''SELECT p.title, m.peak_bytes
+                     FROM (SELECT problem_id, attempt_id, peak_bytes,
+                                  ROW_NUMBER() OVER (PARTITION BY problem_id ORDER BY attempt_id DESC) AS rn
+                           FROM attempt_memory WHERE user_id = ?) m
+                     JOIN problems p ON p.id = m.problem_id
+                     WHERE m.rn <= ?
+                     ORDER BY m.problem_id, m.attempt_id''', (_current_user_id, points))
+        trends = {}
+        for title, peak in c.fetchall():
+            trends.setdefault(title, []).append(peak)
+        return trends
+
+def get_attempt_cases(attempt_id):
+    """Returns [(name, status, duration, detail)] for one attempt, ordered by case name."""
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute('''SELECT ac.name, ac.status, ac.duration, e.body
+                     FROM attempt_cases ac
+                     LEFT JOIN error_messages e ON e.id = ac.detail_id
+                     WHERE ac.attempt_id = ?
+                     ORDER BY ac.name''', (attempt_id,))
+        return [(name, status, duration, unpack_text(body) or "") for name, status, duration, body in c.fetchall()]
+
+def get_failing_cases(limit=10):
+    """
+    The current user's test cases that fail most often.
+    Returns [(problem_title, case_name, failure_count, last_detail)].
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute('''SELECT p.title, f.name, f.failures, e.body
+                     FROM (
+                         SELECT problem_id, name, COUNT(*) AS failures, MAX(attempt_id) AS last_attempt
+                         FROM attempt_cases
+                         WHERE user_id = ? AND status IN ('fail', 'error')
+                         GROUP BY problem_id, name
+                         ORDER BY failures DESC
+                         LIMIT ?
+                     ) f
+                     JOIN problems p ON p.id = f.problem_id
+                     JOIN attempt_cases ac ON ac.attempt_id = f.last_attempt AND ac.name = f.name
+                     LEFT JOIN error_messages e ON e.id = ac.detail_id
+                     ORDER BY f.failures DESC, p.title''', (_current_user_id, limit))
+        return [(title, name, failures, unpack_text(body) or "") for title, name, failures, body in c.fetchall()]
+
+# --- PERFORMANCE PROFILES ---
+def save_performance_profile(problem_id, profile, user_id=None):
+    """
+    Stores a complexity.profile_solution() result for user_id (default the
+    current profile), linked to their latest attempt at the problem (if any).
+    Returns the new profile id.
+    """
+    flush_pending_writes()  # The attempt the profile follows may still be buffered
+    user_id = _current_user_id if user_id is None else user_id
+    curves = {"user": profile["curve"], "reference": profile["reference_curve"]}
+    with transaction() as c:
+        c.execute('''INSERT INTO performance_profiles
+                         (user_id, problem_id, timestamp_ms, slope, complexity,
+                          reference_slope, reference_complexity, verdict, curves, attempt_id)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?,
+                             (SELECT MAX(id) FROM attempts WHERE user_id = ? AND problem_id = ?))''',
+                  (user_id, problem_id, now_ms(), profile["slope"], profile["complexity"],
+                   profile["reference_slope"], profile["reference_complexity"], profile["verdict"],
+                   pack_text(json.dumps(curves)), user_id, problem_id))
+        return c.lastrowid
+
+def get_performance_profiles(problem_id, limit=10, before_id=None, user_id=None):
+    """
+    A user's (default the current profile's) latest profiles of a problem, newest first:
+    [(id, timestamp_ms, attempt_id, attempt_success, slope, complexity, verdict, curves)]
+    where curves is {"user": [[n, seconds], ...], "reference": [...]}. attempt_id and
+    attempt_success are None when there was no attempt (or it was compacted).
+    before_id: only profiles older than this one.
+    """
+    with transaction() as c:
+        c.execute('''SELECT p.id, p.timestamp_ms, p.attempt_id, a.is_success, p.slope, p.complexity,
+                            p.verdict, p.curves
+                     FROM performance_profiles p
+                     LEFT JOIN attempts a ON a.id = p.attempt_id
+                     WHERE p.user_id = ? AND p.problem_id = ? AND p.id < ?
+                     ORDER BY p.id DESC
+                     LIMIT ?''', (_current_user_id if user_id is None else user_id, problem_id,
+                                 before_id or 2 ** 63 - 1, limit))
+        return [row[:7] + (json.loads(unpack_text(row[7])),) for row in c.fetchall()]
+
+# --- RESULT CACHE ---
+def get_cached_result(source_hash, test_hash, python_version):
+    """Returns the cached result dict for this key (and bumps its LRU time), or None."""
+    with transaction(immediate=True) as c:
+        c.execute('''SELECT result FROM result_cache
+                     WHERE source_hash = ? AND test_hash = ? AND python_version = ?''',
+                  (source_hash, test_hash, python_version))
+        row = c.fetchone()
+        if row is None:
+            return None
+        c.execute('''UPDATE result_cache SET last_used_ms = ?, hits = hits + 1
+                     WHERE source_hash = ? AND test_hash = ? AND python_version = ?''',
+                  (now_ms(), source_hash, test_hash, python_version))
+    return json.loads(unpack_text(row[0]))
+
+def store_cached_result(source_hash, test_hash, python_version, result, max_entries=RESULT_CACHE_MAX_ENTRIES):
+    """Caches a result dict, evicting the least recently used entries past max_entries."""
+    ts = now_ms()
+    with transaction() as c:
+        c.execute('''INSERT OR REPLACE INTO result_cache
+                         (source_hash, test_hash, python_version, result, created_ms, last_used_ms)
+                     VALUES (?, ?, ?, ?, ?, ?)''',
+                  (source_hash, test_hash, python_version, pack_text(json.dumps(result)), ts, ts))
+        c.execute('''DELETE FROM result_cache WHERE rowid IN (
+                         SELECT rowid FROM result_cache ORDER BY last_used_ms DESC LIMIT -1 OFFSET ?
+                     )''', (max_entries,))
+
+def clear_result_cache():
+    with transaction() as c:
+        c.execute("DELETE FROM result_cache")
+
+def get_cache_stats():
+    """
+    Returns {"entries", "size_bytes", "hits", "runs", "hit_rate"}; hits/runs
+    count the current user's recorded attempts.
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(result)), 0) FROM result_cache")
+        entries, size_bytes = c.fetchone()
+        c.execute("SELECT COUNT(*), COALESCE(SUM(cached), 0) FROM attempts WHERE user_id = ?", (_current_user_id,))
+        runs, hits = c.fetchone()
+    return {"entries": entries, "size_bytes": size_bytes, "hits": hits, "runs": runs,
+            "hit_rate": hits / runs if runs else 0.0}
+
+def get_global_stats():
+    """Returns wins, fails and last attempt for every problem (read from problem_stats)."""
     query = '''
         SELECT 
             p.title,
-            SUM(CASE WHEN a.is_success = 1 THEN 1 ELSE 0 END) as successes,
-            SUM(CASE WHEN a.is_success = 0 THEN 1 ELSE 0 END) as failures,
-            MAX(a.timestamp) as last_date
+            s.wins as successes,
+            s.fails as failures,
+            s.last_attempt as last_date
         FROM problems p
-        LEFT JOIN attempts a ON p.id = a.problem_id
-        GROUP BY p.title
+        LEFT JOIN problem_stats s ON s.user_id = ? AND s.problem_id = p.id
         ORDER BY last_date DESC
     '''
-    c.execute(query)
-    rows = c.fetchall()
-    conn.close()
-    return rows
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute(query, (_current_user_id,))
+        return c.fetchall()
+
+def get_problem_stats(problem_id, user_id=None):
+    """
+    Returns (wins, fails, attempt_count, last_attempt, best_time, median_time) or None,
+    for user_id (default the current profile).
+    """
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute('''SELECT wins, fails, attempt_count, last_attempt, best_time, median_time
+                     FROM problem_stats WHERE user_id = ? AND problem_id = ?''',
+                  (_current_user_id if user_id is None else user_id, problem_id))
+        return c.fetchone()
 
 
 
 def get_activity_data():
     """
     Returns dates and solved counts for graphing.
-    Output: ([list of dates], [list of counts])
+    Output: ([list of 'YYYY-MM-DD' dates], [list of counts])
     """
-    conn = get_connection()
-    c = conn.cursor()
-    
-    # SQLite query to group successes by Date
-    # "SELECT date(timestamp), COUNT(*) ..."
+    # Successes grouped by local day: a range scan of idx_attempts_user_success_day,
+    # plus the compacted days from daily_rollup
     query = '''
-        SELECT date(timestamp) as day, COUNT(*) as solved_count
-        FROM attempts 
-        WHERE is_success = 1
-        GROUP BY day
-        ORDER BY day ASC
+        SELECT local_day, SUM(solved) as solved_count
+        FROM (
+            SELECT local_day, COUNT(*) as solved
+            FROM attempts 
+            WHERE user_id = ? AND is_success = 1
+            GROUP BY local_day
+            UNION ALL
+            SELECT local_day, SUM(success_count)
+            FROM daily_rollup
+            WHERE user_id = ? AND success_count > 0
+            GROUP BY local_day
+        )
+        GROUP BY local_day
+        ORDER BY local_day ASC
     '''
-    c.execute(query)
-    rows = c.fetchall()
-    conn.close()
+    flush_pending_writes()
+    with transaction() as c:
+        c.execute(query, (_current_user_id, _current_user_id))
+        rows = c.fetchall()
     
     if not rows:
         return [], []
         
     # Separate into two lists
-    dates = [row[0] for row in rows]
+    dates = [day_to_date(row[0]).isoformat() for row in rows]
     counts = [row[1] for row in rows]
     
     return dates, counts
 
 
 def delete_problem(problem_id):
-    """Removes a problem and its history from the database."""
-    conn = get_connection()
-    c = conn.cursor()
-    # SQLite automatically removes linked 'attempts' if we configured CASCADE, 
-    # but to be safe, we manually delete attempts first.
-    c.execute("DELETE FROM attempts WHERE problem_id = ?", (problem_id,))
-    c.execute("DELETE FROM problems WHERE id = ?", (problem_id,))
-    conn.commit()
-    conn.close()
+    """Removes a problem (shared by every profile) and everyone's history of it."""
+    flush_pending_writes()
+    with transaction() as c:
+        # Drop the stats row first so the delete trigger has nothing to maintain
+        c.execute("DELETE FROM problem_stats WHERE problem_id = ?", (problem_id,))
+        # SQLite automatically removes linked 'attempts' if we configured CASCADE, 
+        # but to be safe, we manually delete attempts first.
+        c.execute("DELETE FROM attempts WHERE problem_id = ?", (problem_id,))
+        c.execute("DELETE FROM attempt_cases WHERE problem_id = ?", (problem_id,))
+        c.execute("DELETE FROM performance_profiles WHERE problem_id = ?", (problem_id,))
+        c.execute("DELETE FROM attempt_memory WHERE problem_id = ?", (problem_id,))
+        c.execute("DELETE FROM daily_rollup WHERE problem_id = ?", (problem_id,))
+        c.execute("DELETE FROM user_problems WHERE problem_id = ?", (problem_id,))
+        c.execute("DELETE FROM problems WHERE id = ?", (problem_id,))
+        delete_orphan_messages(c)
 
 
 
-def add_notes_column():
-    """Migration: Adds a 'user_notes' column to the problems table if it doesn't exist."""
+def compact_attempts(horizon_days=COMPACT_AFTER_DAYS, archive_path=None):
+    """
+    Rolls attempts older than horizon_days into daily_rollup and deletes the
+    raw rows, then gives the freed pages back to the OS.
+    archive_path: optional sqlite file that keeps a copy of the raw rows.
+    problem_stats already counts these attempts, so it is left untouched.
+    Returns the number of attempts compacted.
+    """
+    flush_pending_writes()
+    cutoff_day = local_day(now_ms()) - horizon_days
     conn = get_connection()
-    c = conn.cursor()
+    if archive_path:
+        # ATTACH is not allowed inside a transaction
+        conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
     try:
-        # Try to select the column to see if it exists
-        c.execute("SELECT user_notes FROM problems LIMIT 1")
-    except:
-        # If it fails, add the column
-        print("Migrating DB: Adding user_notes column...")
-        c.execute("ALTER TABLE problems ADD COLUMN user_notes TEXT DEFAULT ''")
-        conn.commit()
-    conn.close()
+        with transaction(immediate=True) as c:
+            if archive_path:
+                c.execute('''CREATE TABLE IF NOT EXISTS archive.attempts (
+                                id INTEGER PRIMARY KEY,
+                                user_id INTEGER,
+                                problem_id INTEGER,
+                                problem_title TEXT,
+                                timestamp_ms INTEGER,
+                                local_day INTEGER,
+                                is_success BOOLEAN,
+                                error_message BLOB,
+                                time_taken REAL
+                            )''')
+                c.execute('''INSERT OR IGNORE INTO archive.attempts
+                             SELECT a.id, a.user_id, a.problem_id, p.title, a.timestamp_ms, a.local_day,
+                                    a.is_success, e.body, a.time_taken
+                             FROM main.attempts a
+                             LEFT JOIN main.problems p ON p.id = a.problem_id
+                             LEFT JOIN main.error_messages e ON e.id = a.error_id
+                             WHERE a.local_day < ?''', (cutoff_day,))
+
+            c.execute('''WITH old AS (
+                             SELECT * FROM main.attempts WHERE local_day < ?
+                         ),
+                         ranked AS (
+                             SELECT user_id, problem_id, local_day, time_taken,
+                                    ROW_NUMBER() OVER (PARTITION BY user_id, problem_id, local_day ORDER BY time_taken) AS rn,
+                                    COUNT(*) OVER (PARTITION BY user_id, problem_id, local_day) AS cnt
+                             FROM old
+                             WHERE is_success = 1 AND time_taken > 0
+                         ),
+                         quantiles AS (
+                             SELECT user_id, problem_id, local_day,
+                                    AVG(CASE WHEN rn IN ((cnt + 1) / 2, (cnt + 2) / 2) THEN time_taken END) AS median_time,
+                                    MAX(CASE WHEN rn = (9 * cnt + 9) / 10 THEN time_taken END) AS p90_time
+                             FROM ranked
+                             GROUP BY user_id, problem_id, local_day
+                         )
+                         INSERT INTO daily_rollup
+                             (user_id, problem_id, local_day, attempt_count, success_count, timed_count,
+                              time_sum, best_time, median_time, p90_time, last_attempt)
+                         SELECT o.user_id, o.problem_id, o.local_day,
+                                COUNT(*),
+                                SUM(CASE WHEN o.is_success THEN 1 ELSE 0 END),
+                                SUM(CASE WHEN o.is_success AND o.time_taken > 0 THEN 1 ELSE 0 END),
+                                SUM(CASE WHEN o.is_success AND o.time_taken > 0 THEN o.time_taken ELSE 0 END),
+                                MIN(CASE WHEN o.is_success AND o.time_taken > 0 THEN o.time_taken END),
+                                q.median_time, q.p90_time,
+                                MAX(o.timestamp_ms)
+                         FROM old o
+                         LEFT JOIN quantiles q
+                             ON q.user_id = o.user_id AND q.problem_id = o.problem_id AND q.local_day = o.local_day
+                         WHERE true
+                         GROUP BY o.user_id, o.problem_id, o.local_day
+                         ON CONFLICT (user_id, problem_id, local_day) DO UPDATE SET
+                             attempt_count = attempt_count + excluded.attempt_count,
+                             success_count = success_count + excluded.success_count,
+                             timed_count = timed_count + excluded.timed_count,
+                             time_sum = time_sum + excluded.time_sum,
+                             best_time = COALESCE(MIN(best_time, excluded.best_time), best_time, excluded.best_time),
+                             median_time = COALESCE(median_time, excluded.median_time),
+                             p90_time = COALESCE(p90_time, excluded.p90_time),
+                             last_attempt = MAX(last_attempt, excluded.last_attempt)''', (cutoff_day,))
+
+            # Delete without the stats trigger (problem_stats already includes these rows)
+            c.execute("DROP TRIGGER trg_problem_stats_delete")
+            for table in ("attempt_cases", "attempt_memory"):
+                c.execute(f'''DELETE FROM main.{table}
+                              WHERE attempt_id IN (SELECT id FROM main.attempts WHERE local_day < ?)''', (cutoff_day,))
+            # Profiles are kept; they only lose the link to their compacted attempt
+            c.execute('''UPDATE main.performance_profiles SET attempt_id = NULL
+                         WHERE attempt_id IN (SELECT id FROM main.attempts WHERE local_day < ?)''', (cutoff_day,))
+            c.execute("DELETE FROM main.attempts WHERE local_day < ?", (cutoff_day,))
+            compacted = c.rowcount
+            create_problem_stats_triggers(c)
+
+            delete_orphan_messages(c)
+    finally:
+        if archive_path:
+            conn.execute("DETACH DATABASE archive")
+
+    if compacted:
+        reclaim_space()
+    return compacted
+
+def reclaim_space():
+    """Returns free pages to the OS with an incremental VACUUM."""
+    conn = get_connection()
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        # Files created before auto_vacuum was enabled need one full VACUUM to switch modes
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+    else:
+        conn.execute("PRAGMA incremental_vacuum")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+def get_problem_notes(problem_id):
+    """Returns the current user's notes for a problem ('' if none)."""
+    with transaction() as c:
+        c.execute("SELECT user_notes FROM user_problems WHERE user_id = ? AND problem_id = ?",
+                  (_current_user_id, problem_id))
+        row = c.fetchone()
+    return row[0] if row and row[0] else ""
 
 def save_problem_notes(problem_id, notes):
     """Saves user notes for a specific problem."""
-    conn = get_connection()
-    c = conn.cursor()
-    c.execute("UPDATE problems SET user_notes = ? WHERE id = ?", (notes, problem_id))
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute('''INSERT INTO user_problems (user_id, problem_id, user_notes) VALUES (?, ?, ?)
+                     ON CONFLICT (user_id, problem_id) DO UPDATE SET user_notes = excluded.user_notes''',
+                  (_current_user_id, problem_id, notes))
 
 
 # --- FOR TESTING ONLY ---
 if __name__ == "__main__":
-    print("Testing Database Manager...")
-    init_db()
-    if os.path.exists(DB_FILE):
-        print(f"✅ Success! '{DB_FILE}' was created/updated.")
+    import sys
+    
+    if "--rebuild-stats" in sys.argv:
+        init_db()
+        rebuild_problem_stats()
+        print("✅ problem_stats rebuilt from attempts.")
+    elif "--compact" in sys.argv:
+        # python database_manager.py --compact [DAYS] [--archive FILE]
+        args = sys.argv[sys.argv.index("--compact") + 1:]
+        days = int(args[0]) if args and args[0].isdigit() else COMPACT_AFTER_DAYS
+        archive = args[args.index("--archive") + 1] if "--archive" in args else None
+        init_db()
+        count = compact_attempts(days, archive)
+        print(f"✅ Compacted {count} attempts older than {days} days.")
+    elif "--bench" in sys.argv:
+        # Per-call latency: a fresh sqlite3.connect() per call (old behaviour)
+        # vs. the long-lived per-thread connection.
+        import time
+        import tempfile
+        
+        DB_FILE = os.path.join(tempfile.mkdtemp(), "bench.db")
+        init_db()
+        CALLS = 2000
+        
+        def legacy_get_user_stats():
+            conn = sqlite3.connect(DB_FILE)
+            c = conn.cursor()
+            c.execute("SELECT total_xp, current_level, streak_days FROM user_stats LIMIT 1")
+            stats = c.fetchone()
+            conn.close()
+            return stats
+        
+        def legacy_log_attempt():
+            conn = sqlite3.connect(DB_FILE)
+            c = conn.cursor()
+            ts = now_ms()
+            c.execute("INSERT INTO attempts (user_id, problem_id, timestamp_ms, utc_day, local_day, is_success, error_id, time_taken) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                      (DEFAULT_USER_ID, 1, ts, ts // MS_PER_DAY, local_day(ts), 0, None, 0.0))
+            conn.commit()
+            conn.close()
+        
+        cases = [
+            ("read  (get_user_stats)", legacy_get_user_stats, get_user_stats),
+            ("write (log_attempt)", legacy_log_attempt, lambda: log_attempt(1, 0)),
+        ]
+        print(f"{'CALL':<26} | {'PER-CALL CONNECT':<18} | {'MANAGED':<12} | SPEEDUP")
+        print("-" * 70)
+        for name, legacy, managed in cases:
+            start = time.perf_counter()
+            for _ in range(CALLS):
+                legacy()
+            legacy_us = (time.perf_counter() - start) / CALLS * 1e6
+            
+            start = time.perf_counter()
+            for _ in range(CALLS):
+                managed()
+            managed_us = (time.perf_counter() - start) / CALLS * 1e6
+            
+            print(f"{name:<26} | {legacy_us:>12.1f} µs | {managed_us:>8.1f} µs | {legacy_us / managed_us:.1f}x")
+        close_connection()
     else:
-        print(f"❌ Error: '{DB_FILE}' was not found.")
\ No newline at end of file
+        print("Testing Database Manager...")
+        init_db()
+        if os.path.exists(DB_FILE):
+            print(f"✅ Success! '{DB_FILE}' was created/updated.")
+        else:
+            print(f"❌ Error: '{DB_FILE}' was not found.")
@@ -0,0 +1,237 @@
+import ast
+import sys
+import time
+import random
+import importlib
+
+import database_manager as db
+import ingestion as ingest
+import test_runner as runner
+import complexity as cx
+
+# Random inputs compared per run (CLI: python fuzz.py PROBLEM_ID [CASES])
+FUZZ_CASES = 10000
+# Inputs are generated and run in batches (generation stays out of the call loop)
+BATCH_SIZE = 1000
+# Size of generated inputs: ints up to twice the largest example, strings and
+# lists up to twice the longest one, but never past MAX_SIZE (small inputs
+# find most bugs and keep throughput high)
+MIN_SIZE = 10
+MAX_SIZE = 64
+# Fuzzing runs user code on a pool worker with the usual limits, a bit more time
+FUZZ_LIMITS = {"wall_seconds": 30.0, "cpu_seconds": 20}
+# Diverging values are shown at most this long
+REPR_LIMIT = 200
+
+# Argument annotations understood when the tests have no example calls
+ANNOTATION_SPECS = {
+    "int": ("int", 0, MIN_SIZE),
+    "float": ("float", 0.0, float(MIN_SIZE)),
+    "bool": ("bool",),
+    "str": ("str", "abcxyz", MIN_SIZE),
+    "list": ("list", ("int", 0, MIN_SIZE), MIN_SIZE),
+}
+
+
+# --- INPUT SPECS (built in the parent from the tests and the reference signature) ---
+def reference_signature(reference_code, function_name):
+    """(parameter count, [annotation name or None, ...]) of the reference function, or None."""
+    try:
+        tree = ast.parse(reference_code)
+    except SyntaxError:
+        return None
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == function_name:
+            names = [arg.annotation.id if isinstance(arg.annotation, ast.Name) else None
+                     for arg in node.args.args]
+            return len(names), names
+    return None
+
+def value_spec(values):
+    """
+    A JSON-friendly recipe for random values like the given examples, e.g.
+    ("int", 0, 12) or ("list", ("str", "ab", 10), 10). None if unsupported.
+    """
+    kinds = {type(v) for v in values}
+    if kinds == {bool}:
+        return ("bool",)
+    if kinds <= {int, float} and bool not in kinds:
+        low = min(0, min(values))
+        high = min(max(MIN_SIZE, 2 * max(values)), MAX_SIZE)
+        return ("float", float(low), float(high)) if float in kinds else ("int", int(low), int(high))
+    if kinds == {str}:
+        alphabet = "".join(sorted(set("".join(values)))) or "abc"
+        return ("str", alphabet, min(max(MIN_SIZE, 2 * max(map(len, values))), MAX_SIZE))
+    if kinds in ({list}, {tuple}):
+        items = [item for value in values for item in value]
+        item_spec = value_spec(items) if items else ("int", 0, MIN_SIZE)
+        if item_spec is None:
+            return None
+        kind = "list" if list in kinds else "tuple"
+        return (kind, item_spec, min(max(MIN_SIZE, 2 * max(map(len, values))), MAX_SIZE))
+    return None
+
+def build_specs(test_code, reference_code, function_name):
+    """One value spec per argument, or (None, reason)."""
+    signature = reference_signature(reference_code, function_name)
+    if signature is None:
+        return None, f"The reference solution does not define {function_name}()."
+    arity, annotations = signature
+    examples = [e for e in cx.find_examples(test_code, function_name) if len(e) == arity]
+    specs = []
+    for position in range(arity):
+        if examples:
+            spec = value_spec([example[position] for example in examples])
+        else:
+            spec = ANNOTATION_SPECS.get(annotations[position])
+        if spec is None:
+            return None, f"Cannot generate inputs for argument {position + 1} of {function_name}()."
+        specs.append(spec)
+    return specs, None
+
+
+# --- GENERATION & COMPARISON (runs inside a pool worker) ---
+def make_generator(spec, rng):
+    """A zero-argument function producing random values for a spec."""
+    kind = spec[0]
+    if kind == "bool":
+        return lambda: rng.random() < 0.5
+    if kind == "int":
+        low, high = spec[1], spec[2]
+        return lambda: rng.randint(low, high)
+    if kind == "float":
+        low, high = spec[1], spec[2]
+        return lambda: rng.uniform(low, high)
+    if kind == "str":
+        alphabet, max_len = spec[1], spec[2]
+        return lambda: "".join(rng.choices(alphabet, k=rng.randint(0, max_len)))
+    item, max_len = make_generator(spec[1], rng), spec[2]
+    if kind == "tuple":
+        return lambda: tuple(item() for _ in range(rng.randint(0, max_len)))
+    return lambda: [item() for _ in range(rng.randint(0, max_len))]
+
+def is_mutable(spec):
+    return spec[0] == "list" or (spec[0] == "tuple" and is_mutable(spec[1]))
+
+def make_copier(spec):
+    """A function copying values of a spec as deep as they are mutable (much faster than deepcopy)."""
+    if not is_mutable(spec):
+        return lambda value: value
+    if not is_mutable(spec[1]):
+        return list if spec[0] == "list" else (lambda value: value)
+    item = make_copier(spec[1])
+    if spec[0] == "tuple":
+        return lambda value: tuple(item(x) for x in value)
+    return lambda value: [item(x) for x in value]
+
+def call(function, args):
+    """('value', result) or ('raises', exception type name)."""
+    try:
+        return ("value", function(*args))
+    except Exception as e:
+        return ("raises", type(e).__name__)
+
+def short_repr(value):
+    text = repr(value)
+    return text if len(text) <= REPR_LIMIT else text[:REPR_LIMIT] + "..."
+
+def describe(outcome):
+    kind, value = outcome
+    return f"raises {value}" if kind == "raises" else short_repr(value)
+
+def fuzz(filename, function_name, reference_code, specs, cases=FUZZ_CASES, seed=0):
+    """
+    Worker task: calls the user's function and the reference on the same
+    random inputs, BATCH_SIZE at a time, until 'cases' inputs agreed or one
+    diverged. Results agree when both return equal values or both raise the
+    same exception type.
+    Returns {"comparisons", "seconds", "divergence": {...} or None}.
+    """
+    module = importlib.import_module(f"{runner.SOLUTIONS_PACKAGE}.{filename.replace('.py', '')}")
+    user_function = getattr(module, function_name)
+    namespace = {"__name__": "reference_solution"}
+    exec(compile(reference_code, "<reference>", "exec"), namespace)
+    reference_function = namespace[function_name]
+
+    rng = random.Random(seed)
+    generators = [make_generator(spec, rng) for spec in specs]
+    # Either side may modify its arguments in place, so each gets its own copy
+    mutable = any(is_mutable(spec) for spec in specs)
+    copiers = [make_copier(spec) for spec in specs]
+
+    comparisons = 0
+    start = time.perf_counter()
+    while comparisons < cases:
+        batch = [tuple(generate() for generate in generators)
+                 for _ in range(min(BATCH_SIZE, cases - comparisons))]
+        if mutable:
+            reference_args = [tuple(copy(arg) for copy, arg in zip(copiers, args)) for args in batch]
+            user_args = [tuple(copy(arg) for copy, arg in zip(copiers, args)) for args in batch]
+        else:
+            reference_args = user_args = batch
+        expected = [call(reference_function, args) for args in reference_args]
+        actual = [call(user_function, args) for args in user_args]
+        for index, (want, got) in enumerate(zip(expected, actual)):
+            if want != got:
+                return {"comparisons": comparisons + index + 1, "seconds": time.perf_counter() - start,
+                        "divergence": {"args": ", ".join(short_repr(arg) for arg in batch[index]),
+                                       "expected": describe(want), "actual": describe(got)}}
+        comparisons += len(batch)
+    return {"comparisons": comparisons, "seconds": time.perf_counter() - start, "divergence": None}
+
+
+# --- ENTRY POINT ---
+def fuzz_solution(problem_id, cases=FUZZ_CASES, seed=None, pool=None):
+    """
+    Differential test of the user's solution against the reference solution
+    on random inputs shaped like the ones the tests use.
+    Returns (report, None), or (None, error_message).
+    """
+    problem = db.get_problem(problem_id)
+    if not problem:
+        return None, "Problem not found."
+    _, _, filename, _, test_code, _ = problem
+
+    function_name = cx.find_function_name(test_code)
+    if not function_name:
+        return None, "Could not find the solution function in the tests."
+    reference_code = ingest.load_reference_solution(problem_id)
+    if not reference_code:
+        return None, "No reference solution to compare against."
+    specs, error = build_specs(test_code, reference_code, function_name)
+    if error:
+        return None, error
+
+    seed = random.randrange(2 ** 32) if seed is None else seed
+    reply = (pool or runner.get_pool()).run_task(
+        "fuzz", "fuzz",
+        {"filename": filename, "function_name": function_name, "reference_code": reference_code,
+         "specs": specs, "cases": cases, "seed": seed},
+        limits=FUZZ_LIMITS)
+    if reply["value"] is None:
+        return None, f"{reply['outcome']}: {reply['error']}"
+    return dict(reply["value"], function=function_name, seed=seed), None
+
+def format_report(report):
+    """Text report: the first diverging input, or how many inputs agreed and how fast."""
+    divergence = report["divergence"]
+    if not divergence:
+        rate = report["comparisons"] / report["seconds"] if report["seconds"] else 0
+        return (f"✅ {report['function']} matches the reference on {report['comparisons']} random inputs "
+                f"({report['seconds']:.2f}s, {rate:,.0f}/s, seed {report['seed']})")
+    return "\n".join([
+        f"❌ {report['function']} differs from the reference (random input #{report['comparisons']}, seed {report['seed']})",
+        f"   Input:     {report['function']}({divergence['args']})",
+        f"   Expected:  {divergence['expected']}",
+        f"   Got:       {divergence['actual']}",
+    ])
+
+
+if __name__ == "__main__":
+    # python fuzz.py PROBLEM_ID [CASES]
+    if len(sys.argv) < 2:
+        print("Usage: python fuzz.py PROBLEM_ID [CASES]")
+        sys.exit(1)
+    db.init_db()
+    report, error = fuzz_solution(int(sys.argv[1]), int(sys.argv[2]) if len(sys.argv) > 2 else FUZZ_CASES)
+    print(format_report(report) if report else f"❌ {error}")
@@ -14,23 +14,20 @@ def calculate_xp_reward(tries_count):
     else:
         return 10
 
-def award_xp(problem_id):
+def award_xp(problem_id, user_id=None):
     """
     Calculates XP, updates DB, and returns a success message.
+    user_id: who solved it (default the current profile).
     """
     # 1. Check how many attempts it took
-    conn = db.get_connection()
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM attempts WHERE problem_id = ?", (problem_id,))
-    result = c.fetchone()
-    tries = result[0] if result else 1
-    conn.close()
+    stats = db.get_problem_stats(problem_id, user_id)
+    tries = stats[2] if stats else 1
     
     # 2. Calculate Reward
     xp_amount = calculate_xp_reward(tries)
     
     # 3. Update Database
-    leveled_up, new_level, total_xp = db.update_xp(xp_amount)
+    leveled_up, new_level, total_xp = db.update_xp(xp_amount, user_id)
     
     # 4. Create message
     msg = f"\n⭐ +{xp_amount} XP EARNED! (Total: {total_xp})"
@@ -0,0 +1,104 @@
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database_manager as db
+import test_runner as runner
+import gamification as game
+
+SOLUTIONS_DIR = "solutions"
+
+
+def grade_problem(pool, problem, use_cache=True):
+    """Runs one problem's tests on the pool. Returns (problem, result, wall_seconds)."""
+    pid, title, filename, test_code = problem
+    start = time.perf_counter()
+    result = runner.run_cached(pool.run, test_code, filename, use_cache)
+    return problem, result, time.perf_counter() - start
+
+def regrade_all(workers=None, use_cache=True, limits=None):
+    """
+    Re-runs every problem that has a solution file, in parallel on 'workers'
+    warm test processes (default: one per core). Unchanged solutions are
+    answered from the result cache unless use_cache is False.
+    limits: overrides for runner.DEFAULT_LIMITS; a runaway solution is
+    stopped and recorded as TIMEOUT/MEMORY-LIMIT instead of stalling the batch.
+    Results are logged as attempts in one batch and the solved flags are
+    updated to match (a solution that now fails becomes unsolved). Problems
+    that go from unsolved to solved earn XP like a normal solve; the message
+    is kept in result['reward'].
+    Returns ([(problem, result, wall_seconds), ...], total_wall_seconds).
+    """
+    problems = [p for p in db.get_problem_tests()
+                if os.path.exists(os.path.join(SOLUTIONS_DIR, p[2]))]
+    if not problems:
+        return [], 0.0
+    # Read before logging: a passing attempt marks its problem solved
+    was_solved = {pid for pid, _, _, solved in db.get_dashboard_problems() if solved}
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(problems)))
+    start = time.perf_counter()  # Overall time includes warming the workers
+    pool = runner.WorkerPool(size=workers, limits=limits).start().wait_ready()
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            graded = list(executor.map(lambda p: grade_problem(pool, p, use_cache), problems))
+    finally:
+        pool.close()
+    wall = time.perf_counter() - start
+
+    # One transaction for every attempt, one for the solved flags
+    now, user_id = db.now_ms(), db.get_current_user()
+    db.log_attempts([(problem[0], now, result['success'], result['message'], 0.0, user_id,
+                      result['cases'], result['cached'], result['outcome'], result['memory'])
+                     for problem, result, _ in graded])
+    db.set_solved_states([(problem[0], result['success']) for problem, result, _ in graded])
+    for problem, result, _ in graded:
+        if result['success'] and problem[0] not in was_solved:
+            result['reward'] = game.award_xp(problem[0], user_id)
+    return graded, wall
+
+def print_summary(graded, wall):
+    """Prints the per-problem table plus overall throughput."""
+    print("\n" + "="*80)
+    print("🧪  REGRADE RESULTS")
+    print("="*80)
+    print(f"{'ID':<4} | {'PROBLEM NAME':<45} | {'RESULT':<16} | {'TIME'}")
+    print("-" * 80)
+    for (pid, title, _, _), result, seconds in graded:
+        if result['success']:
+            status = "✅ PASS"
+        elif result['outcome'] in (runner.OUTCOME_TIMEOUT, runner.OUTCOME_MEMORY_LIMIT):
+            status = f"⛔ {result['outcome']}"
+        else:
+            status = "❌ FAIL"
+        cached = " (cached)" if result['cached'] else ""
+        print(f"{pid:<4} | {title[:45]:<45} | {status:<16} | {seconds * 1000:>7.1f} ms{cached}")
+    print("-" * 80)
+
+    passed = sum(1 for _, result, _ in graded if result['success'])
+    hits = sum(1 for _, result, _ in graded if result['cached'])
+    rate = len(graded) / wall if wall else 0.0
+    print(f"Passed {passed}/{len(graded)} in {wall:.2f}s ({rate:.1f} problems/s, {hits} from cache)")
+    for (_, title, _, _), result, _ in graded:
+        if result.get('reward'):
+            print(f"\n🎯 Newly solved: {title}{result['reward']}")
+
+
+if __name__ == "__main__":
+    # python grader.py [--workers N] [--no-cache] [--timeout SECONDS] [--memory-mb MB]
+    workers = None
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    limits = {}
+    if "--timeout" in sys.argv:
+        limits["wall_seconds"] = float(sys.argv[sys.argv.index("--timeout") + 1])
+    if "--memory-mb" in sys.argv:
+        limits["memory_mb"] = int(sys.argv[sys.argv.index("--memory-mb") + 1])
+
+    db.init_db()
+    graded, wall = regrade_all(workers, use_cache="--no-cache" not in sys.argv, limits=limits)
+    if graded:
+        print_summary(graded, wall)
+    else:
+        print(f"⚠️ No solution files found in '{SOLUTIONS_DIR}'.")
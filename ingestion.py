@@ -0,0 +1,319 @@
+import io
+import os
+import re
+import hashlib
+import tarfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import database_manager as db
+import quiz_extractor as qx
+
+QUESTIONS_DIR = "questions"
+HTML_EXTENSION = ".html"
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+# Below this many files, starting the process pool costs more than it saves
+PARALLEL_THRESHOLD = 16
+
+HTML_TAG_PATTERN = re.compile('<.*?>')
+
+
+def make_solution_filename(title):
+    """Turns '001 Square of side N' into 'Square_of_side_N.py'."""
+    clean_name = re.sub(r'^\d+\s*', '', title)
+    clean_name = re.sub(r'[^\w\s-]', '', clean_name)
+    return clean_name.strip().replace(' ', '_') + ".py"
+
+def build_problem_row(data, py_filename=None):
+    """
+    Converts a parsed quizData dict into a row for the problems table.
+    Output: (title, filename, instructions, solution_stub, test_code, reference_solution)
+    """
+    title = data['title']
+    filename = py_filename or make_solution_filename(title)
+    instructions = HTML_TAG_PATTERN.sub('', data['instructions']).strip()
+    reference_solution = data['solutions'][0]['content']
+    solution_stub = reference_solution.split('\n')[0] + "\n    pass\n"
+    test_code = data['tests'][0]['content']
+    return (title, filename, instructions, solution_stub, test_code, reference_solution)
+
+def parse_html_file(task):
+    """
+    Worker: reads one HTML file and extracts its problem row.
+    task: (path, known_hash). If the content hash equals known_hash the
+    file is not parsed again and 'row' is None with 'unchanged' set.
+    """
+    path, known_hash = task
+    result = {"path": path, "size": None, "mtime": None, "hash": None, "offset": None,
+              "row": None, "unchanged": False, "error": None, "replaced_title": None}
+    try:
+        stat = os.stat(path)
+        hasher = hashlib.sha256()
+        # One streaming pass: hash every chunk while the scanner picks out quizData
+        with open(path, 'rb') as f:
+            scanner = qx.scan_quiz_data(f, on_chunk=hasher.update)
+        data = scanner.data
+        result["size"], result["mtime"] = stat.st_size, stat.st_mtime
+        result["hash"] = hasher.hexdigest()
+        result["offset"] = scanner.offset
+
+        if known_hash is not None and result["hash"] == known_hash:
+            result["unchanged"] = True
+            return result
+
+        if data is None:
+            result["error"] = "quizData not found"
+            return result
+
+        result["row"] = build_problem_row(data)
+    except (OSError, KeyError, IndexError, TypeError) as e:
+        result["error"] = str(e)
+    return result
+
+def parse_html_files(paths, known_hashes=None, max_workers=None):
+    """
+    Parses many HTML files, fanning the work out over a process pool
+    when there are enough of them. Results keep the order of 'paths'.
+    """
+    known_hashes = known_hashes or {}
+    tasks = [(path, known_hashes.get(path)) for path in paths]
+
+    if len(tasks) < PARALLEL_THRESHOLD or max_workers == 1:
+        return [parse_html_file(task) for task in tasks]
+
+    workers = max_workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(parse_html_file, tasks, chunksize=chunksize))
+
+def ingest_html_files(paths, manifest=None, force_py_filename=None, max_workers=None):
+    """
+    Parses the given HTML files in parallel and writes every problem
+    (plus the file manifest) to the DB in one batched transaction.
+    Files whose hash matches 'manifest' are not re-parsed.
+    A file whose title changed retires the problem it used to hold
+    (result["replaced_title"]).
+    Returns the list of parse results.
+    """
+    # Titles the files had before; looked up even when nothing is skipped
+    previous = manifest if manifest is not None else db.get_file_manifest()
+    manifest = manifest or {}
+    known_hashes = {path: manifest[path][2] for path in paths if path in manifest}
+    results = parse_html_files(paths, known_hashes, max_workers)
+
+    rows = []
+    manifest_entries = []
+    sources = []
+    for result in results:
+        if result["hash"] is None:
+            print(f"❌ Could not read '{result['path']}': {result['error']}")
+            continue
+
+        row = result["row"]
+        if row and force_py_filename:
+            row = (row[0], force_py_filename) + row[2:]
+            result["row"] = row
+        if row:
+            rows.append(row)
+            sources.append((result["path"], None, result["hash"], result["offset"], row[0]))
+        elif result["error"]:
+            print(f"⚠️ Skipping '{result['path']}': {result['error']}")
+
+        if result["unchanged"]:
+            title = manifest[result["path"]][3]
+        else:
+            title = row[0] if row else None
+        manifest_entries.append((result["path"], result["size"], result["mtime"], result["hash"], title))
+
+    db.bulk_upsert_problems(rows, manifest_entries, sources)
+    retire_replaced_titles(results, previous)
+    return results
+
+def retire_replaced_titles(results, previous):
+    """Retires the old problem of every file whose quizData title changed."""
+    current = {row[0] for row in (r["row"] for r in results) if row}
+    batch_paths = {r["path"] for r in results}
+    # Another file may still hold the old title (duplicates, or the title moved there)
+    claimed = {entry[3] for path, entry in previous.items() if path not in batch_paths}
+    replaced = []
+    for result in results:
+        old_title = previous[result["path"]][3] if result["row"] and result["path"] in previous else None
+        if old_title and old_title not in current and old_title not in claimed:
+            result["replaced_title"] = old_title
+            replaced.append(old_title)
+            print(f"🔁 '{old_title}' is now '{result['row'][0]}' (old title retired)")
+    db.retire_problems(replaced)
+
+def sync_questions_dir(questions_dir=QUESTIONS_DIR, max_workers=None):
+    """
+    Incrementally syncs a questions folder with the DB.
+    Only new or changed files are parsed (tracked by the file manifest).
+    Missing files are retired.
+    Returns (imported_titles, [(missing_path, old_title), ...]).
+    """
+    files = [f for f in os.listdir(questions_dir) if f.endswith(HTML_EXTENSION)]
+
+    manifest = db.get_file_manifest()
+    seen_paths = set()
+    candidates = []
+
+    for f in files:
+        full_path = os.path.join(questions_dir, f)
+        seen_paths.add(full_path)
+
+        # Cheap check: same size + mtime means nothing changed
+        stat = os.stat(full_path)
+        entry = manifest.get(full_path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime:
+            continue
+
+        candidates.append(full_path)
+
+    # Retire first, so a renamed file re-activates its problem when ingested below
+    missing = sorted(p for p in manifest if p not in seen_paths)
+    retire_files(missing, manifest)
+
+    results = ingest_html_files(candidates, manifest, max_workers=max_workers)
+
+    imported = upserted_titles(results)
+    return imported, [(p, manifest[p][3]) for p in missing]
+
+def upserted_titles(results):
+    """One title per problem row written (files sharing a title write the same row)."""
+    return list(dict.fromkeys(r["row"][0] for r in results if r["row"]))
+
+def retire_files(paths, manifest):
+    """
+    Forgets question files that no longer exist and hides their problems
+    from the dashboard (history is kept). Returns the retired titles.
+    """
+    gone = set(paths)
+    # Another file may still hold the title (duplicates, or the title moved there)
+    claimed = {entry[3] for path, entry in manifest.items() if path not in gone}
+    titles = list(dict.fromkeys(manifest[p][3] for p in paths
+                                if p in manifest and manifest[p][3] and manifest[p][3] not in claimed))
+    db.remove_manifest_entries(paths)
+    db.retire_problems(titles)
+    return titles
+
+def sync_paths(paths, max_workers=None):
+    """
+    Syncs only the given question files (used by the folder watcher).
+    Changed files are re-ingested, deleted ones are retired.
+    Returns (imported_titles, retired_titles).
+    """
+    manifest = db.get_file_manifest()
+    present = [p for p in paths if os.path.exists(p)]
+    gone = [p for p in paths if not os.path.exists(p)]
+
+    retired = retire_files(gone, manifest)
+    results = ingest_html_files(present, manifest, max_workers=max_workers)
+
+    imported = upserted_titles(results)
+    retired += [r["replaced_title"] for r in results if r["replaced_title"]]
+    return imported, [t for t in retired if t not in imported]
+
+def is_archive(path):
+    """True if the path looks like a zip/tar course pack."""
+    return path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+def iter_archive_html(archive_path):
+    """
+    Yields (member_name, binary_stream) for every HTML file inside a zip or
+    tar archive. Members are streamed straight from the archive, never
+    extracted to disk.
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or not info.filename.endswith(HTML_EXTENSION):
+                    continue
+                with zf.open(info) as stream:
+                    yield info.filename, stream
+    else:
+        # 'r|*' = sequential stream mode, so tar.gz is decompressed only once
+        with tarfile.open(archive_path, 'r|*') as tf:
+            for member in tf:
+                if not member.isfile() or not member.name.endswith(HTML_EXTENSION):
+                    continue
+                stream = tf.extractfile(member)
+                if stream:
+                    yield member.name, stream
+
+def ingest_archive(archive_path, store_member_path=True):
+    """
+    Imports every problem HTML inside a zip/tar archive in a single pass
+    and one DB transaction.
+    store_member_path: remember (archive, member) so the original HTML can
+    be recovered later with read_archive_member().
+    Returns the list of imported titles.
+    """
+    rows = []
+    sources = []
+    for member_name, stream in iter_archive_html(archive_path):
+        try:
+            hasher = hashlib.sha256()
+            scanner = qx.scan_quiz_data(stream, on_chunk=hasher.update)
+            data = scanner.data
+            if data is None:
+                print(f"⚠️ Skipping '{member_name}': quizData not found")
+                continue
+            row = build_problem_row(data)
+        except (KeyError, IndexError, TypeError) as e:
+            print(f"⚠️ Skipping '{member_name}': {e}")
+            continue
+
+        rows.append(row)
+        if store_member_path:
+            sources.append((os.path.abspath(archive_path), member_name, hasher.hexdigest(), scanner.offset, row[0]))
+        else:
+            sources.append((None, None, hasher.hexdigest(), scanner.offset, row[0]))
+
+    db.bulk_upsert_problems(rows, sources=sources)
+    return [row[0] for row in rows]
+
+def read_archive_member(archive_path, member_name):
+    """Returns the raw bytes of one member of a zip/tar archive."""
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as zf:
+            return zf.read(member_name)
+    with tarfile.open(archive_path, 'r:*') as tf:
+        return tf.extractfile(member_name).read()
+
+def load_quiz_data(problem_id):
+    """
+    Re-reads the quizData of a problem from the HTML it was ingested from
+    (a file or an archive member). Returns the dict, or None if the source
+    is gone.
+    """
+    source = db.get_problem_source(problem_id)
+    if not source:
+        return None
+    source_path, member, _, _ = source
+    try:
+        if member:
+            with io.BytesIO(read_archive_member(source_path, member)) as stream:
+                return qx.scan_quiz_data(stream).data
+        with open(source_path, 'rb') as f:
+            return qx.scan_quiz_data(f).data
+    except (OSError, KeyError, zipfile.BadZipFile, tarfile.TarError):
+        return None
+
+def load_reference_solution(problem_id):
+    """
+    Returns the reference implementation (quizData solutions[0]) of a problem,
+    or None. Stored at ingestion; problems ingested before that are read from
+    their source once and stored then.
+    """
+    stored = db.get_reference_solution(problem_id)
+    if stored:
+        return stored
+    data = load_quiz_data(problem_id)
+    try:
+        reference = data['solutions'][0]['content'] if data else None
+    except (KeyError, IndexError, TypeError):
+        return None
+    if reference:
+        db.save_reference_solution(problem_id, reference)
+    return reference
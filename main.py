@@ -1,80 +1,80 @@
 import os
-import re
-import json
+import sys
 import time # <--- FOR TIMER
 import database_manager as db
+import attempt_logger as alog
+import ingestion as ingest
+import watcher as watch
 import test_runner as runner
 import gamification as game
 import quality_check as qc  # <--- NEW
 import reviewer as rev      # <--- NEW
 import visualizer as viz  # <--- NEW IMPORT
-
-HTML_EXTENSION = ".html"
+import grader
+import complexity as cx
+import fuzz
 
 # Update the Configuration at the top
 QUESTIONS_DIR = "questions"  # <--- New constant
 HTML_EXTENSION = ".html"
 
 def sync_html_files():
-    """Scans for HTML files in the 'questions' folder and sends data to DB."""
+    """
+    Scans for HTML files in the 'questions' folder and sends data to DB.
+    Only new or changed files are parsed (tracked by the file manifest).
+    """
     
     # Check if directory exists
     if not os.path.exists(QUESTIONS_DIR):
         print(f"⚠️ Warning: '{QUESTIONS_DIR}' folder not found.")
         return
 
-    # List files in the subdirectory
-    files = [f for f in os.listdir(QUESTIONS_DIR) if f.endswith(HTML_EXTENSION)]
+    imported, missing = ingest.sync_questions_dir(QUESTIONS_DIR)
+    if imported:
+        print(f"📥 Synced {len(imported)} new/changed problem(s).")
     
-    for f in files:
-        # Build the full path (e.g., "questions/001 Square.html")
-        full_path = os.path.join(QUESTIONS_DIR, f)
-        
-        with open(full_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-        
-        match = re.search(r'const quizData = ({.*?});', content, re.DOTALL)
-        if not match: continue
-        
-        try:
-            data = json.loads(match.group(1))
-            title = data['title']
-            clean_name = re.sub(r'^\d+\s*', '', title) 
-            clean_name = re.sub(r'[^\w\s-]', '', clean_name)
-            clean_name = clean_name.strip().replace(' ', '_') + ".py"
-            cleanr = re.compile('<.*?>')
-            instructions = re.sub(cleanr, '', data['instructions']).strip()
-            solution_stub = data['solutions'][0]['content'].split('\n')[0] + "\n    pass\n"
-            test_code = data['tests'][0]['content']
-            
-            db.upsert_problem(title, clean_name, instructions, solution_stub, test_code)
-        except json.JSONDecodeError:
-            continue
+    # Report files that were ingested before but are gone now
+    if missing:
+        print(f"🗑️  {len(missing)} question file(s) disappeared from '{QUESTIONS_DIR}' (retired):")
+        for path, title in missing:
+            print(f"   - {os.path.basename(path)}" + (f" ({title})" if title else ""))
 
 def show_history_stats():
     """Displays global stats."""
     stats = db.get_global_stats()
-    print("\n" + "="*80)
+    memory_trends = db.get_memory_trends()
+    print("\n" + "="*110)
     print(f"📜  GLOBAL HISTORY & PERFORMANCE STATS")
-    print("="*80)
-    print(f"{'PROBLEM NAME':<35} | {'WINS':<6} | {'FAILS':<6} | {'LAST ATTEMPT'}")
-    print("-" * 80)
+    print("="*110)
+    print(f"{'PROBLEM NAME':<35} | {'WINS':<6} | {'FAILS':<6} | {'LAST ATTEMPT':<19} | {'PEAK MEMORY (LATEST RUNS)'}")
+    print("-" * 110)
     for row in stats:
         title, wins, losses, last_date = row
         wins = wins if wins else 0
         losses = losses if losses else 0
-        date_display = str(last_date).split('.')[0] if last_date else "Never"
-        print(f"{title:<35} | {wins:<6} | {losses:<6} | {date_display}")
+        date_display = db.format_timestamp(last_date)
+        memory = " → ".join(db.format_bytes(peak) for peak in memory_trends.get(title, [])) or "-"
+        print(f"{title:<35} | {wins:<6} | {losses:<6} | {date_display:<19} | {memory}")
+
+    cache = db.get_cache_stats()
+    print(f"\n♻️  Result cache: {cache['entries']} entries ({cache['size_bytes'] / 1024:.0f} KB), "
+          f"hit rate {cache['hit_rate']:.0%} ({cache['hits']}/{cache['runs']} runs)")
+
+    failing = db.get_failing_cases()
+    if failing:
+        print("\n🔻 MOST FAILED TEST CASES")
+        print("-" * 80)
+        for title, case_name, failures, detail in failing:
+            print(f"{failures:>4}x  {title[:30]:<30} :: {case_name}")
+            if detail:
+                print(f"       last: {detail.splitlines()[0][:70]}")
     input("\nPress [ENTER] to return...")
 
 def show_dashboard():
     """Displays dashboard with Review Notification."""
-    conn = db.get_connection()
-    c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM problems")
-    total = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM problems WHERE is_solved = 1")
-    solved = c.fetchone()[0]
+    rows = db.get_dashboard_problems()
+    total = len(rows)
+    solved = sum(1 for row in rows if row[3])
     
     # Check for Reviews
     due_problems = rev.get_due_problems()
@@ -85,9 +85,6 @@ def show_dashboard():
     print(f"   Progress: {solved}/{total} Solved")
     print("="*70)
     
-    c.execute("SELECT id, title, filename, is_solved FROM problems")
-    rows = c.fetchall()
-    
     for row in rows:
         status = "[✅]" if row[3] else "[  ]"
         # Highlight due problems with a special mark
@@ -95,9 +92,8 @@ def show_dashboard():
         mark = "⚠️ " if is_due else ""
         print(f"{row[0]:<3} {status} {mark}{row[1]}")
     
-    conn.close()
     print("-" * 70)
-    print("Enter ID to solve  |  H for History  |  G for Graph  |  Q to Quit") # <--- UPDATE THIS LINE
+    print("Enter ID to solve  |  H for History  |  G for Graph  |  R to Regrade all  |  Q to Quit")
     return rows
 
 # Add this near the top of main.py
@@ -107,11 +103,7 @@ SOLUTIONS_DIR = "solutions"
 
 def solve_mode(problem_id):
     """The interactive mode for solving."""
-    conn = db.get_connection()
-    c = conn.cursor()
-    c.execute("SELECT title, instructions, filename, solution_stub, test_code, is_solved FROM problems WHERE id = ?", (problem_id,))
-    data = c.fetchone()
-    conn.close()
+    data = db.get_problem(problem_id)
     
     if not data: return
     title, instructions, filename, stub, test_code, is_solved = data
@@ -134,13 +126,35 @@ def solve_mode(problem_id):
         print(f"📄 Using existing file: {full_path}")
 
     # Mistake Log Logic (Keep as is...)
-    history = db.get_problem_history(problem_id)
-    failed_tries = sum(1 for h in history if not h[1])
+    # Counts come from problem_stats; the log itself is only read on demand
+    stats = db.get_problem_stats(problem_id)
+    total_tries, failed_tries = (stats[2], stats[1]) if stats else (0, 0)
     if failed_tries > 0:
-        print(f"\n📊 History: {len(history)} attempts ({failed_tries} failures)")
+        print(f"\n📊 History: {total_tries} attempts ({failed_tries} failures)")
         choice = input("👉 Press [H] for Mistake Log, or [ENTER] to solve: ").strip().lower()
+        cursor = None
         if choice == 'h':
-            print("--- Mistake Log Shown ---") # (Simplified for brevity)
+            trend = db.get_memory_trend(problem_id)
+            if trend:
+                print("🧠 Memory trend (peak): " + " → ".join(db.format_bytes(row[2]) for row in trend))
+        while choice == 'h':
+            page, cursor = db.get_problem_history_page(problem_id, before=cursor)
+            for timestamp, success, error_msg, peak_bytes, attempt_id in page:
+                memory = f"  [🧠 {db.format_bytes(peak_bytes)}]" if peak_bytes is not None else ""
+                if success:
+                    print(f"✅ {db.format_timestamp(timestamp)}: SOLVED{memory}")
+                    continue
+                failed_cases = runner.failed_case_lines(db.get_attempt_cases(attempt_id))
+                if failed_cases:
+                    print(f"❌ {db.format_timestamp(timestamp)}: {len(failed_cases)} failing test case(s){memory}")
+                    for line in failed_cases:
+                        print(f"   - {line}")
+                else:
+                    short_err = error_msg.split('\n')[0] if error_msg else "Unknown Error"
+                    print(f"❌ {db.format_timestamp(timestamp)}: {short_err}{memory}")
+            if cursor is None:
+                break
+            choice = input("👉 Press [H] for older attempts, or [ENTER] to solve: ").strip().lower()
 
     input(f"\n⏱️  Timer will start when you press [ENTER]...")
     
@@ -159,9 +173,18 @@ def solve_mode(problem_id):
     # Pass the FULL PATH to the runner now
     result = runner.run_test_module(test_code, filename) 
     
-    db.log_attempt(problem_id, result['success'], result['message'], time_taken=duration)
+    alog.log_attempt(problem_id, result['success'], result['message'], time_taken=duration,
+                     cases=result['cases'], cached=result['cached'], outcome=result['outcome'],
+                     memory=result['memory'])
     
+    if result['cached']:
+        print("♻️  Solution unchanged since the last run (cached result)")
     print(result['message'])
+    if result['cases'] and not result['success']:
+        passed = sum(1 for case in result['cases'] if case['status'] == runner.CASE_PASS)
+        print(f"\n📋 {passed}/{len(result['cases'])} test cases passed")
+    if result['memory']:
+        print("\n" + runner.format_memory(result['memory']))
     
     if result['success']:
         print(f"\n⏱️  Time Taken: {duration} seconds")
@@ -179,13 +202,51 @@ def solve_mode(problem_id):
             print(game.award_xp(problem_id))
         else:
             print("💡 Problem already solved.")
+
+        choice = input("\n👉 Press [P] to profile performance, [F] to fuzz against the reference, "
+                       "or [ENTER] to return: ").strip().lower()
+        if choice == 'p':
+            print("\n⏱️  Timing your solution on growing inputs...")
+            profile, error = cx.profile_solution(problem_id)
+            print(cx.format_profile(profile) if profile else f"❌ {error}")
+        elif choice == 'f':
+            print(f"\n🎲 Comparing your solution with the reference on {fuzz.FUZZ_CASES} random inputs...")
+            report, error = fuzz.fuzz_solution(problem_id)
+            print(fuzz.format_report(report) if report else f"❌ {error}")
+        else:
+            return
             
     input("\nPress [ENTER] to return...")
 
+def print_live_changes(imported, retired):
+    """Watcher callback for the CLI (--watch)."""
+    for title in imported:
+        print(f"\n📥 Live-synced: {title}")
+    for title in retired:
+        print(f"\n🗑️  Retired: {title}")
+
+def select_profile():
+    """Picks the profile from '--user NAME' (created on first use)."""
+    if "--user" in sys.argv:
+        index = sys.argv.index("--user") + 1
+        if index < len(sys.argv):
+            db.set_current_user(db.get_or_create_user(sys.argv[index]))
+            print(f"👤 Profile: {sys.argv[index]}")
+
 def main():
     db.init_db()
+    select_profile()
+    if "--no-cache" in sys.argv:
+        runner.RESULT_CACHE_ENABLED = False
+    if "--profile-memory" in sys.argv:
+        runner.PROFILE_MEMORY = True
+    runner.get_pool()  # Warm the test workers while the sync runs
     sync_html_files()
     
+    # Optional: keep ingesting changes to questions/ while the CLI runs
+    if "--watch" in sys.argv:
+        watch.QuestionsWatcher(QUESTIONS_DIR, on_change=print_live_changes).start()
+    
     while True:
         problems = show_dashboard()
         choice = input("\n> ").strip().lower()
@@ -197,6 +258,10 @@ def main():
             show_history_stats()
         elif choice == 'g':               # <--- ADDED THIS BLOCK
             viz.generate_progress_graph()
+        elif choice == 'r':
+            graded, wall = grader.regrade_all()
+            grader.print_summary(graded, wall)
+            input("\nPress [ENTER] to return...")
         else:
             try:
                 pid = int(choice)
@@ -0,0 +1,210 @@
+import re
+import json
+
+# The Udemy export embeds the problem as:  const quizData = {...};
+QUIZ_MARKER = b"const quizData ="
+CHUNK_SIZE = 64 * 1024
+
+# Jump straight to the next byte that matters instead of looping per byte.
+# (UTF-8 multi-byte characters never contain these ASCII bytes.)
+STRUCTURE_BYTES = re.compile(rb'[{}"]')
+STRING_BODY = re.compile(rb'[^"\\]*(?:\\.[^"\\]*)*', re.DOTALL)
+WHITESPACE = b" \t\r\n"
+
+OPEN_BRACE, CLOSE_BRACE, QUOTE, BACKSLASH = ord('{'), ord('}'), ord('"'), ord('\\')
+
+
+class QuizDataScanner:
+    """
+    Incremental quizData extractor.
+    feed() it byte chunks in order; once 'done' is True, 'data' holds the
+    decoded dict (or None if the object was malformed).
+    Only the JSON object itself is buffered, never the whole file.
+    """
+
+    def __init__(self):
+        self.done = False
+        self.data = None
+        self.offset = None      # Byte offset of the opening '{' in the stream
+        self._state = "search"  # search -> start -> object
+        self._tail = b""        # Keeps a partial marker split across chunks
+        self._consumed = 0      # Bytes fed before the current chunk
+        self._buffer = bytearray()
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """Processes the next chunk. Returns True once the object is complete."""
+        if self.done or not chunk:
+            return self.done
+
+        base = self._consumed
+        self._consumed += len(chunk)
+        pos = 0
+
+        if self._state == "search":
+            buf = self._tail + chunk
+            idx = buf.find(QUIZ_MARKER)
+            if idx == -1:
+                self._tail = buf[-(len(QUIZ_MARKER) - 1):]
+                return False
+            # Re-base on the chunk (the marker may have started inside the tail)
+            pos = idx + len(QUIZ_MARKER) - len(self._tail)
+            self._tail = b""
+            self._state = "start"
+
+        if self._state == "start":
+            while pos < len(chunk) and chunk[pos] in WHITESPACE:
+                pos += 1
+            if pos == len(chunk):
+                return False
+            if chunk[pos] != OPEN_BRACE:
+                # Not an object literal; keep looking for another marker
+                self._state = "search"
+                return self._refeed(chunk, pos)
+            self.offset = base + pos
+            self._state = "object"
+
+        return self._scan_object(chunk, pos)
+
+    def _refeed(self, chunk, pos):
+        # Re-feeds the remainder of a chunk after a false marker match
+        self._consumed -= len(chunk) - pos
+        return self.feed(chunk[pos:])
+
+    def _scan_object(self, chunk, pos):
+        start = pos
+        n = len(chunk)
+
+        if self._escape:
+            pos += 1
+            self._escape = False
+
+        while pos < n:
+            if self._in_string:
+                # Skip the whole string body (including escapes) in one C call
+                pos = STRING_BODY.match(chunk, pos).end()
+                if pos >= n:
+                    break
+                if chunk[pos] == BACKSLASH:
+                    # Escape split across chunks: skip its first byte next time
+                    self._escape = True
+                    pos = n
+                    break
+                pos += 1
+                self._in_string = False
+            else:
+                match = STRUCTURE_BYTES.search(chunk, pos)
+                if not match:
+                    pos = n
+                    break
+                pos = match.end()
+                byte = chunk[match.start()]
+                if byte == QUOTE:
+                    self._in_string = True
+                elif byte == OPEN_BRACE:
+                    self._depth += 1
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._buffer += chunk[start:pos]
+                        self._finish()
+                        return True
+
+        self._buffer += chunk[start:pos]
+        return False
+
+    def _finish(self):
+        self.done = True
+        raw, self._buffer = self._buffer, bytearray()
+        try:
+            self.data = json.loads(raw)
+        except ValueError:
+            self.data = None
+
+
+def scan_quiz_data(stream, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """
+    Reads a binary stream in chunks and returns the finished QuizDataScanner
+    (use .data for the dict and .offset for where the object starts).
+    on_chunk: optional callback that sees every chunk (e.g. a hasher); when
+    given, the stream is read to the end even after the object is found.
+    """
+    scanner = QuizDataScanner()
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        if on_chunk:
+            on_chunk(chunk)
+        if scanner.feed(chunk) and not on_chunk:
+            break
+    return scanner
+
+def extract_quiz_data(stream, chunk_size=CHUNK_SIZE, on_chunk=None):
+    """Reads a binary stream in chunks and returns the quizData dict (or None)."""
+    return scan_quiz_data(stream, chunk_size, on_chunk).data
+
+def extract_quiz_data_from_file(path, chunk_size=CHUNK_SIZE):
+    """Convenience wrapper: extracts quizData from an HTML file on disk."""
+    with open(path, 'rb') as f:
+        return extract_quiz_data(f, chunk_size)
+
+
+# --- MICRO-BENCHMARK (streaming scanner vs. the old regex) ---
+if __name__ == "__main__":
+    import io
+    import timeit
+    import tracemalloc
+
+    LEGACY_PATTERN = re.compile(r'const quizData = ({.*?});', re.DOTALL)
+
+    def legacy_extract(raw):
+        match = LEGACY_PATTERN.search(raw.decode('utf-8'))
+        return json.loads(match.group(1)) if match else None
+
+    def make_html(solution_kb, tricky=False, padding_kb=4):
+        # tricky=True puts '};' inside a JSON string, which breaks the regex
+        line = "    x = {'a': 1};\n" if tricky else "    x = [1, 2, 3]\n"
+        body = line * (solution_kb * 1024 // len(line))
+        quiz = {"title": "001 Bench", "instructions": "<p>bench</p>",
+                "tests": [{"content": "import unittest\n"}],
+                "solutions": [{"content": "def f(n):\n" + body}]}
+        page = "<html><body>" + "<div>padding</div>" * (padding_kb * 1024 // 18)
+        return (page + "<script>const quizData = " + json.dumps(quiz) + ";</script>" + page).encode('utf-8')
+
+    print(f"{'SIZE':<10} | {'REGEX (ms)':<12} | {'STREAM (ms)':<12} | {'REGEX PEAK':<12} | {'STREAM PEAK':<12}")
+    print("-" * 70)
+    # (solution size, page padding) -> the last case is a small quiz in a huge page
+    for kb, padding_kb in ((6, 4), (64, 4), (1024, 4), (8192, 4), (6, 8192)):
+        raw = make_html(kb, padding_kb=padding_kb)
+        runs = max(3, 2000 // max(kb, padding_kb))
+
+        regex_ms = timeit.timeit(lambda: legacy_extract(raw), number=runs) / runs * 1000
+        stream_ms = timeit.timeit(lambda: extract_quiz_data(io.BytesIO(raw)), number=runs) / runs * 1000
+
+        # Peak memory (excluding the input itself): the regex path needs the
+        # whole decoded file, the scanner only the JSON object
+        tracemalloc.start()
+        legacy_extract(raw)
+        regex_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        stream = io.BytesIO(raw)
+        tracemalloc.start()
+        assert extract_quiz_data(stream)["title"] == "001 Bench"
+        stream_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        print(f"{len(raw) // 1024:>6} KB | {regex_ms:<12.2f} | {stream_ms:<12.2f} | "
+              f"{regex_peak // 1024:>8} KB | {stream_peak // 1024:>8} KB")
+
+    # Correctness: '};' inside a JSON string
+    tricky = make_html(6, tricky=True)
+    try:
+        regex_result = "ok" if legacy_extract(tricky) else "no match"
+    except ValueError:
+        regex_result = "JSONDecodeError"
+    stream_result = "ok" if extract_quiz_data(io.BytesIO(tricky)) else "failed"
+    print(f"\n'}};' inside a string -> regex: {regex_result} | stream: {stream_result}")
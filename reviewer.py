@@ -6,23 +6,22 @@ def get_due_problems():
     Returns a list of problems that need review.
     Logic: Solved > 3 days ago OR Failed recently.
     """
-    conn = db.get_connection()
-    c = conn.cursor()
-    
     # Simple algorithm: Find problems solved more than 3 days ago
     review_threshold = datetime.now() - timedelta(days=3)
     
+    # Range scan of the current user's stats by last attempt (idx_problem_stats_user_last)
     query = '''
-        SELECT p.id, p.title, MAX(a.timestamp) as last_attempt
-        FROM problems p
-        JOIN attempts a ON p.id = a.problem_id
-        WHERE p.is_solved = 1
-        GROUP BY p.id
-        HAVING last_attempt < ?
+        SELECT p.id, p.title, s.last_attempt
+        FROM problem_stats s
+        JOIN problems p ON p.id = s.problem_id
+        JOIN user_problems up ON up.user_id = s.user_id AND up.problem_id = s.problem_id
+        WHERE s.user_id = ? AND s.last_attempt < ?
+          AND up.is_solved = 1 AND p.is_retired = 0
     '''
     
-    c.execute(query, (review_threshold,))
-    rows = c.fetchall()
-    conn.close()
+    db.flush_pending_writes()
+    with db.transaction() as c:
+        c.execute(query, (db.get_current_user(), db.to_ms(review_threshold)))
+        rows = c.fetchall()
     
     return rows
\ No newline at end of file
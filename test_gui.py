@@ -4,19 +4,29 @@ import subprocess
 import sys
 import tkinter as tk # Needed for text tags (coloring)
 import shutil  # To copy files
-import json    # To read the problem data
-import re      # To find the data inside HTML
+import queue   # Hands watcher results to the Tk thread
+import threading
+from concurrent.futures import ThreadPoolExecutor  # Runs tests off the Tk thread
 from tkinter import filedialog  # To open the "Select File" window
 from tkinter import messagebox # For the confirmation pop-up
 
 # Import our logic modules
 import database_manager as db
+import attempt_logger as alog
+import ingestion as ingest
+import watcher as watch
 import gamification as game
 import test_runner as runner
 import visualizer as viz
+import complexity as cx
+import fuzz
 
 # Constants
 SOLUTIONS_DIR = "solutions"
+# How many problems can run their tests at the same time
+GUI_PARALLEL_RUNS = 2
+# How often (ms) a running test's streamed output is drained into its console
+RUN_POLL_MS = 50
 
 # --- APP CONFIGURATION ---
 ctk.set_appearance_mode("Dark")
@@ -25,7 +35,6 @@ ctk.set_default_color_theme("blue")
 class DSAApp(ctk.CTk):
     def __init__(self):
         super().__init__()
-        db.add_notes_column()
 
         # 1. Window Setup
         self.title("DSA Progress Tracker")
@@ -67,6 +76,26 @@ class DSAApp(ctk.CTk):
         self.level_label = ctk.CTkLabel(self.sidebar_frame, text="Loading...", font=self.ui_font, justify="left")
         self.level_label.grid(row=5, column=0, padx=20, pady=20)
 
+        # Live Sync: watch questions/ and ingest changes as they happen
+        self.watcher = None
+        self.live_changes = queue.Queue()
+
+        # Mistake Log paging state ({"problem_id", "console", "cursor"} or None)
+        self.history_view = None
+
+        # Test runs happen on background threads; {problem_id: run} while in flight
+        self.run_executor = ThreadPoolExecutor(max_workers=GUI_PARALLEL_RUNS, thread_name_prefix="test-run")
+        self.active_runs = {}
+        # Other background work that prints into a console (profiling, ...)
+        self.background_jobs = []
+        self.live_sync_switch = ctk.CTkSwitch(self.sidebar_frame, text="Live Sync", command=self.toggle_live_sync)
+        self.live_sync_switch.grid(row=6, column=0, padx=20, pady=(0, 20))
+
+        # Profiles: everyone in the study group shares one database
+        self.profile_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=self.profile_names(), command=self.switch_profile)
+        self.profile_menu.set(dict(db.get_users()).get(db.get_current_user(), db.DEFAULT_USER_NAME))
+        self.profile_menu.grid(row=7, column=0, padx=20, pady=(0, 20))
+
         # 4. Main Content Area
         self.main_frame = ctk.CTkFrame(self, corner_radius=10)
         self.main_frame.grid(row=0, column=1, sticky="nsew", padx=20, pady=20)
@@ -92,7 +121,8 @@ class DSAApp(ctk.CTk):
                 cmd = [
                     'zenity', '--file-selection', '--multiple', 
                     '--separator=|', '--title=Select Problem HTML Files',
-                    '--file-filter=HTML Files | *.html'
+                    '--file-filter=HTML Files | *.html',
+                    '--file-filter=Course Archives | *.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz'
                 ]
                 # We run this to check if Zenity exists and what the user does
                 result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
@@ -115,7 +145,8 @@ class DSAApp(ctk.CTk):
         if use_fallback: 
             file_paths = filedialog.askopenfilenames(
                 title="Select Problem HTML Files",
-                filetypes=[("HTML Files", "*.html")]
+                filetypes=[("HTML Files", "*.html"),
+                           ("Course Archives", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz")]
             )
 
         if not file_paths:
@@ -126,36 +157,31 @@ class DSAApp(ctk.CTk):
         if not os.path.exists("questions"):
             os.makedirs("questions")
 
+        dest_paths = []
         imported_count = 0
         for src_path in file_paths:
             try:
                 src_path = src_path.strip()
                 filename = os.path.basename(src_path)
+                
+                # Course packs are streamed straight into the DB (no extraction)
+                if ingest.is_archive(src_path):
+                    imported_count += len(ingest.ingest_archive(src_path))
+                    continue
+
                 dest_path = os.path.join("questions", filename)
                 
                 if os.path.abspath(src_path) != os.path.abspath(dest_path):
                     shutil.copy(src_path, dest_path)
-
-                with open(dest_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                match = re.search(r'const quizData = ({.*?});', content, re.DOTALL)
-                if match:
-                    data = json.loads(match.group(1))
-                    title = data['title']
-                    clean_name = re.sub(r'^\d+\s*', '', title) 
-                    clean_name = re.sub(r'[^\w\s-]', '', clean_name).strip().replace(' ', '_') + ".py"
-                    cleanr = re.compile('<.*?>')
-                    instructions = re.sub(cleanr, '', data['instructions']).strip()
-                    solution_stub = data['solutions'][0]['content'].split('\n')[0] + "\n    pass\n"
-                    test_code = data['tests'][0]['content']
-                    
-                    db.upsert_problem(title, clean_name, instructions, solution_stub, test_code)
-                    imported_count += 1
+                dest_paths.append(dest_path)
                     
             except Exception as e:
                 print(f"Failed to import {filename}: {e}")
 
+        # Parse all files in parallel and write them in one transaction
+        results = ingest.ingest_html_files(dest_paths)
+        imported_count += sum(1 for r in results if r["row"])
+
         if imported_count > 0:
             print(f"Imported {imported_count} files.")
             self.refresh_problem_list()
@@ -239,39 +265,94 @@ class DSAApp(ctk.CTk):
         # Clear List
         for widget in self.scroll_frame.winfo_children():
             widget.destroy()
+        self.problem_cards = {}
+        self.filter_query = filter_query
 
         # Fetch Data
-        conn = db.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT id, title, is_solved FROM problems")
-        rows = c.fetchall()
-        conn.close()
+        rows = db.get_dashboard_problems()
 
         for problem in rows:
-            pid, title, is_solved = problem
+            pid, title, _, is_solved = problem
             
             if filter_query and filter_query not in title.lower(): continue
 
-            card = ctk.CTkFrame(self.scroll_frame)
-            card.pack(fill="x", pady=5)
+            self.problem_cards[pid] = self.build_problem_card(pid, title, is_solved)
+
+    def build_problem_card(self, pid, title, is_solved):
+        """Creates one row of the dashboard list."""
+        card = ctk.CTkFrame(self.scroll_frame)
+        card.pack(fill="x", pady=5)
+        
+        # --- DISPLAY LOGIC BASED ON MODE ---
+        if self.select_mode:
+            # CHECKBOX for selection
+            chk = ctk.CTkCheckBox(card, text="", width=24, command=lambda p=pid: self.toggle_selection(p))
+            chk.pack(side="left", padx=10, pady=10)
             
-            # --- DISPLAY LOGIC BASED ON MODE ---
-            if self.select_mode:
-                # CHECKBOX for selection
-                chk = ctk.CTkCheckBox(card, text="", width=24, command=lambda p=pid: self.toggle_selection(p))
-                chk.pack(side="left", padx=10, pady=10)
-                
-                # Title
-                ctk.CTkLabel(card, text=f"{pid}. {title}", font=("DejaVu Sans", 14)).pack(side="left", padx=5)
-            else:
-                # NORMAL MODE (Status Icon + Buttons)
-                status_text = "✔" if is_solved else "⚫"
-                status_color = "#4CAF50" if is_solved else "#9E9E9E"
-                ctk.CTkLabel(card, text=status_text, font=("DejaVu Sans Mono", 16), text_color=status_color).pack(side="left", padx=10, pady=10)
-                ctk.CTkLabel(card, text=f"{pid}. {title}", font=("DejaVu Sans", 14)).pack(side="left", padx=5)
-                
-                btn_text = "Review" if is_solved else "Solve"
-                ctk.CTkButton(card, text=btn_text, width=80, command=lambda p=pid: self.open_solver_view(p)).pack(side="right", padx=10)
+            # Title
+            ctk.CTkLabel(card, text=f"{pid}. {title}", font=("DejaVu Sans", 14)).pack(side="left", padx=5)
+        else:
+            # NORMAL MODE (Status Icon + Buttons)
+            status_text = "✔" if is_solved else "⚫"
+            status_color = "#4CAF50" if is_solved else "#9E9E9E"
+            ctk.CTkLabel(card, text=status_text, font=("DejaVu Sans Mono", 16), text_color=status_color).pack(side="left", padx=10, pady=10)
+            ctk.CTkLabel(card, text=f"{pid}. {title}", font=("DejaVu Sans", 14)).pack(side="left", padx=5)
+            
+            btn_text = "Review" if is_solved else "Solve"
+            ctk.CTkButton(card, text=btn_text, width=80, command=lambda p=pid: self.open_solver_view(p)).pack(side="right", padx=10)
+        return card
+
+    # --- PROFILES ---
+    NEW_PROFILE = "➕ New Profile..."
+
+    def profile_names(self):
+        return [name for _, name in db.get_users()] + [self.NEW_PROFILE]
+
+    def switch_profile(self, choice):
+        if choice == self.NEW_PROFILE:
+            name = ctk.CTkInputDialog(text="Profile name:", title="New Profile").get_input()
+            if not name or not name.strip():
+                self.profile_menu.set(dict(db.get_users()).get(db.get_current_user()))
+                return
+            choice = name.strip()
+        db.set_current_user(db.get_or_create_user(choice))
+        self.profile_menu.configure(values=self.profile_names())
+        self.profile_menu.set(choice)
+        self.history_view = None
+        self.update_sidebar_stats()
+        self.show_dashboard_view()
+
+    # --- LIVE SYNC (questions/ watcher) ---
+    def toggle_live_sync(self):
+        if self.live_sync_switch.get() == 1:
+            self.watcher = watch.QuestionsWatcher(on_change=lambda imported, retired: self.live_changes.put((imported, retired)))
+            self.watcher.start()
+            self.poll_live_changes()
+        elif self.watcher:
+            self.watcher.stop()
+            self.watcher = None
+
+    def poll_live_changes(self):
+        """Runs on the Tk thread: applies whatever the watcher thread queued up."""
+        while not self.live_changes.empty():
+            imported, retired = self.live_changes.get()
+            self.apply_problem_changes(imported, retired)
+        if self.watcher:
+            self.after(300, self.poll_live_changes)
+
+    def apply_problem_changes(self, imported, retired):
+        """Adds/removes only the affected dashboard cards (no full rebuild)."""
+        if not hasattr(self, 'problem_cards') or not self.scroll_frame.winfo_exists():
+            return  # Dashboard not visible; it will be fresh next time it opens
+
+        retired = set(retired)
+        for pid, title, is_solved in db.get_problems_by_title(list(imported) + list(retired)):
+            if title in retired:
+                card = self.problem_cards.pop(pid, None)
+                if card: card.destroy()
+            elif pid not in self.problem_cards:
+                if self.filter_query and self.filter_query not in title.lower(): continue
+                self.problem_cards[pid] = self.build_problem_card(pid, title, is_solved)
 
     def toggle_selection(self, pid):
         """Tracks which items are checked."""
@@ -301,20 +382,34 @@ class DSAApp(ctk.CTk):
         if not os.path.exists(recycle_dir):
             os.makedirs(recycle_dir)
 
-        conn = db.get_connection()
-        c = conn.cursor()
-        
         deleted_count = 0
+        kept = []
 
         for pid in self.selected_problems:
             # Get info to find the files
-            c.execute("SELECT title, filename FROM problems WHERE id = ?", (pid,))
-            row = c.fetchone()
+            with db.transaction() as c:
+                c.execute("SELECT title, filename FROM problems WHERE id = ?", (pid,))
+                row = c.fetchone()
             
             if row:
                 title, py_filename = row
+
+                # --- A. Move HTML Question (The "Textbook") ---
+                # The ingestion step recorded which HTML file each problem came from.
+                source = db.get_problem_source(pid)
+                if source and not source[1]:  # source[1] set = lives inside an archive
+                    html_path = source[0]
+                    if os.path.exists(html_path):
+                        try:
+                            shutil.move(html_path, os.path.join(recycle_dir, os.path.basename(html_path)))
+                            db.remove_manifest_entries([html_path])
+                        except Exception as e:
+                            # Keep the problem: its unchanged file would never be synced back in
+                            print(f"Error moving HTML {html_path}: {e}")
+                            kept.append(title)
+                            continue
                 
-                # --- A. Move Python Solution (The "Notebook") ---
+                # --- B. Move Python Solution (The "Notebook") ---
                 # This might not exist if you haven't clicked "Solve" yet.
                 py_path = os.path.join("solutions", py_filename)
                 if os.path.exists(py_path):
@@ -323,36 +418,16 @@ class DSAApp(ctk.CTk):
                     except Exception as e:
                         print(f"Error moving solution {py_filename}: {e}")
 
-                # --- B. Move HTML Question (The "Textbook") ---
-                # We scan the 'questions' folder to find the HTML file with the matching Title.
-                if os.path.exists("questions"):
-                    for html_file in os.listdir("questions"):
-                        if not html_file.endswith(".html"): continue
-                        
-                        full_html_path = os.path.join("questions", html_file)
-                        try:
-                            # Read file to check Title
-                            with open(full_html_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                            
-                            # Extract JSON to match Title
-                            match = re.search(r'const quizData = ({.*?});', content, re.DOTALL)
-                            if match:
-                                data = json.loads(match.group(1))
-                                if data['title'] == title:
-                                    # FOUND IT! Move HTML to Recycle Bin
-                                    shutil.move(full_html_path, os.path.join(recycle_dir, html_file))
-                                    break 
-                        except Exception as e:
-                            print(f"Error checking HTML {html_file}: {e}")
-
             # C. Delete from DB
             db.delete_problem(pid)
             deleted_count += 1
-
-        conn.close()
         
-        messagebox.showinfo("Success", f"Moved {deleted_count} problems to Recycle Bin.")
+        if kept:
+            messagebox.showwarning("Partial Delete",
+                f"Moved {deleted_count} problems to Recycle Bin.\n"
+                f"Kept {len(kept)} whose question file could not be moved:\n" + "\n".join(kept))
+        else:
+            messagebox.showinfo("Success", f"Moved {deleted_count} problems to Recycle Bin.")
         self.toggle_select_mode() # Reset mode
         self.refresh_problem_list() # Force refresh
 
@@ -397,13 +472,14 @@ class DSAApp(ctk.CTk):
         
         # Data Fetch
         stats = db.get_global_stats()
+        memory_trends = db.get_memory_trends()
         
         # Scrollable Table Container
         table_frame = ctk.CTkScrollableFrame(self.main_frame)
         table_frame.pack(fill="both", expand=True, padx=20, pady=10)
         
         # Table Headers
-        headers = ["Problem Name", "Wins", "Fails", "Last Attempt"]
+        headers = ["Problem Name", "Wins", "Fails", "Last Attempt", "Peak Memory"]
         header_row = ctk.CTkFrame(table_frame, fg_color="#333333")
         header_row.pack(fill="x", pady=2)
         
@@ -412,6 +488,7 @@ class DSAApp(ctk.CTk):
         header_row.columnconfigure(1, weight=1)
         header_row.columnconfigure(2, weight=1)
         header_row.columnconfigure(3, weight=2) # Date is wide
+        header_row.columnconfigure(4, weight=2) # Memory trend of the latest profiled runs
         
         for i, h in enumerate(headers):
             ctk.CTkLabel(header_row, text=h, font=("DejaVu Sans", 12, "bold")).grid(row=0, column=i, padx=5, pady=5, sticky="ew")
@@ -421,7 +498,8 @@ class DSAApp(ctk.CTk):
             title, wins, losses, last_date = row_data
             wins = wins if wins else 0
             losses = losses if losses else 0
-            date_display = str(last_date).split('.')[0] if last_date else "Never"
+            date_display = db.format_timestamp(last_date)
+            memory = " → ".join(db.format_bytes(peak) for peak in memory_trends.get(title, [])) or "-"
             
             row = ctk.CTkFrame(table_frame)
             row.pack(fill="x", pady=2)
@@ -429,21 +507,19 @@ class DSAApp(ctk.CTk):
             row.columnconfigure(1, weight=1)
             row.columnconfigure(2, weight=1)
             row.columnconfigure(3, weight=2)
+            row.columnconfigure(4, weight=2)
             
             ctk.CTkLabel(row, text=title, anchor="w").grid(row=0, column=0, padx=10, pady=5, sticky="ew")
             ctk.CTkLabel(row, text=str(wins), text_color="#4CAF50").grid(row=0, column=1, padx=5, pady=5) # Green Wins
             ctk.CTkLabel(row, text=str(losses), text_color="#F44336").grid(row=0, column=2, padx=5, pady=5) # Red Losses
             ctk.CTkLabel(row, text=date_display).grid(row=0, column=3, padx=5, pady=5)
+            ctk.CTkLabel(row, text=memory, text_color="#2196F3").grid(row=0, column=4, padx=5, pady=5)
 
     # --- VIEW: SOLVER ---
     def open_solver_view(self, problem_id):
         self.clear_main_frame()
         
-        conn = db.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT title, instructions, filename, solution_stub, test_code, is_solved FROM problems WHERE id = ?", (problem_id,))
-        data = c.fetchone()
-        conn.close()
+        data = db.get_problem(problem_id)
         
         if not data: return
         title, instructions, filename, stub, test_code, is_solved = data
@@ -488,11 +564,20 @@ class DSAApp(ctk.CTk):
         
         run_btn = ctk.CTkButton(right_pane, text="▶ Run Tests", fg_color="green", hover_color="darkgreen",
                                 command=lambda: self.run_tests_gui(problem_id, filename, test_code, self.console_box, is_solved))
-        run_btn.pack(fill="x", padx=10, pady=15)
+        run_btn.pack(fill="x", padx=10, pady=(15, 5))
+
+        ctk.CTkButton(right_pane, text="■ Stop", fg_color="#616161", hover_color="#424242",
+                      command=lambda: self.stop_run(problem_id)).pack(fill="x", padx=10, pady=(0, 15))
         
         ctk.CTkButton(right_pane, text="📜 View Mistake Log", fg_color="#FF9800", hover_color="#F57C00",
                       command=lambda: self.show_history(problem_id, self.console_box)).pack(fill="x", padx=10, pady=5)
 
+        ctk.CTkButton(right_pane, text="⏱ Profile Performance", fg_color="#607D8B", hover_color="#455A64",
+                      command=lambda: self.profile_gui(problem_id, self.console_box)).pack(fill="x", padx=10, pady=5)
+
+        ctk.CTkButton(right_pane, text="🎲 Fuzz vs Reference", fg_color="#7E57C2", hover_color="#5E35B1",
+                      command=lambda: self.fuzz_gui(problem_id, self.console_box)).pack(fill="x", padx=10, pady=5)
+
         # --- TABS: CONSOLE & NOTES ---
         self.tab_view = ctk.CTkTabview(right_pane)
         self.tab_view.pack(fill="both", expand=True, padx=10, pady=10)
@@ -515,17 +600,16 @@ class DSAApp(ctk.CTk):
         self.console_box.tag_config("pass", foreground="#4CAF50")
         self.console_box.tag_config("fail", foreground="#F44336")
         self.console_box.tag_config("info", foreground="#2196F3")
+        if problem_id in self.active_runs:
+            # Tests still running from an earlier visit: pick up their output
+            self.attach_run(self.active_runs[problem_id], self.console_box)
 
         # TAB 2: NOTES
         self.notes_box = ctk.CTkTextbox(tab_notes, font=("DejaVu Sans", 12))
         self.notes_box.pack(fill="both", expand=True, pady=(0, 10))
         
         # Load existing notes
-        conn = db.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT user_notes FROM problems WHERE id = ?", (problem_id,))
-        saved_notes = c.fetchone()[0]
-        conn.close()
+        saved_notes = db.get_problem_notes(problem_id)
         if saved_notes:
             self.notes_box.insert("0.0", saved_notes)
             
@@ -560,55 +644,240 @@ class DSAApp(ctk.CTk):
             print(f"Error: {e}")
 
     def run_tests_gui(self, problem_id, filename, test_code, console, was_solved):
+        """Starts the tests in the background; output streams into the console as it arrives."""
+        if problem_id in self.active_runs:
+            # Already running: just show its output (again) in this console
+            self.attach_run(self.active_runs[problem_id], console)
+            return
+
+        # The profile is pinned now: switching profiles mid-run must not move the credit
+        run = {"problem_id": problem_id, "user_id": db.get_current_user(), "console": None,
+               "events": queue.Queue(), "cancel": threading.Event(),
+               "transcript": [], "streamed_cases": 0, "was_solved": was_solved}
+        self.active_runs[problem_id] = run
+        self.attach_run(run, console)
+        self.write_run(run, "Running tests...\n", "info")
+        run["future"] = self.run_executor.submit(runner.run_test_module, test_code, filename,
+                                                 on_event=run["events"].put, cancel=run["cancel"])
+        self.after(RUN_POLL_MS, self.poll_run, run)
+
+    def stop_run(self, problem_id):
+        run = self.active_runs.get(problem_id)
+        if run and not run["cancel"].is_set():
+            run["cancel"].set()
+            self.write_run(run, "\nStopping...\n", "info")
+
+    def attach_run(self, run, console):
+        """Makes 'console' show this run: replays what it printed so far, then keeps streaming."""
+        self.history_view = None  # Stop paging the Mistake Log into this console
+        self.detach_console(console)
+        run["console"] = console
         console.configure(state="normal")
         console.delete("0.0", "end")
-        console.insert("0.0", "Running tests...\n", "info")
-        console.update()
+        for text, tag in run["transcript"]:
+            console.insert("end", text, tag)
+        console.see("end")
+        console.configure(state="disabled")
+
+    def detach_console(self, console):
+        """Runs keep going (and logging) without a console once it is reused for something else."""
+        for run in list(self.active_runs.values()) + self.background_jobs:
+            if run["console"] is console:
+                run["console"] = None
+
+    def start_job(self, console, intro, work, render):
+        """
+        Runs work() on the test executor, so the window stays responsive;
+        render(result) -> (text, tag) is then shown in the console (if it is
+        still showing this job).
+        """
+        self.history_view = None
+        self.detach_console(console)
+        console.configure(state="normal")
+        console.delete("0.0", "end")
+        console.insert("0.0", intro, "info")
+        console.configure(state="disabled")
+        job = {"console": console, "future": self.run_executor.submit(work), "render": render}
+        self.background_jobs.append(job)
+        self.after(RUN_POLL_MS, self.poll_job, job)
+
+    def poll_job(self, job):
+        if not job["future"].done():
+            self.after(RUN_POLL_MS, self.poll_job, job)
+            return
+        self.background_jobs.remove(job)
+        console = job["console"]
+        if console is None or not console.winfo_exists():
+            return
+        try:
+            text, tag = job["render"](job["future"].result())
+        except Exception as e:
+            text, tag = f"\n{e}\n", "fail"
+        console.configure(state="normal")
+        console.insert("end", text, tag)
+        console.see("end")
+        console.configure(state="disabled")
+
+    def write_run(self, run, text, tag=None):
+        run["transcript"].append((text, tag))
+        console = run["console"]
+        if console is None or not console.winfo_exists():
+            return  # Solver view closed or console reused; the transcript keeps it
+        console.configure(state="normal")
+        console.insert("end", text, tag)
+        console.see("end")
+        console.configure(state="disabled")
+
+    def write_case(self, run, case):
+        """One line per test case, failures with their assertion diff."""
+        if case['status'] == runner.CASE_PASS:
+            self.write_run(run, f"  ✔ {case['name']}  ({case['duration'] * 1000:.1f} ms)\n", "pass")
+        elif case['status'] == runner.CASE_SKIP:
+            self.write_run(run, f"  - {case['name']} (skipped)\n", "info")
+        else:
+            self.write_run(run, f"  ✘ {case['name']}\n", "fail")
+            self.write_run(run, "      " + case['detail'].replace("\n", "\n      ") + "\n", "fail")
+
+    def poll_run(self, run):
+        """Runs on the Tk thread: drains the events the worker streamed so far."""
+        finished = run["future"].done()  # Checked first: every event is queued before the run returns
+        while True:
+            try:
+                event = run["events"].get_nowait()
+            except queue.Empty:
+                break
+            if event["event"] == "output":
+                self.write_run(run, event["text"])
+            elif event["event"] == "case":
+                run["streamed_cases"] += 1
+                self.write_case(run, event["case"])
+        if finished:
+            self.finish_run(run)
+        else:
+            self.after(RUN_POLL_MS, self.poll_run, run)
+
+    def finish_run(self, run):
+        problem_id = run["problem_id"]
+        del self.active_runs[problem_id]
+        try:
+            result = run["future"].result()
+        except Exception as e:
+            self.write_run(run, f"\n[ERROR]\n{e}\n", "fail")
+            return
+
+        if result['cached']:
+            self.write_run(run, "Solution unchanged since the last run (cached result)\n", "info")
 
-        result = runner.run_test_module(test_code, filename)
-        
         # Color Coded Output
         if result['success']:
-            console.insert("end", "\n[SUCCESS]\n", "pass")
-            console.insert("end", result['message'] + "\n")
-            
-            if not was_solved:
-                reward = game.award_xp(problem_id)
-                console.insert("end", reward, "pass")
+            self.write_run(run, "\n[SUCCESS]\n", "pass")
+            self.write_run(run, result['message'] + "\n")
+
+            if not run["was_solved"]:
+                reward = game.award_xp(problem_id, run["user_id"])
+                self.write_run(run, reward, "pass")
                 self.update_sidebar_stats()
+        elif result['cases'] and result['outcome'] == runner.OUTCOME_FAIL:
+            self.write_run(run, "\n[FAILED]\n", "fail")
+            # Cases that were not streamed (e.g. a cached result)
+            for case in result['cases'][run["streamed_cases"]:]:
+                self.write_case(run, case)
         else:
-            console.insert("end", "\n[FAILED]\n", "fail")
-            # We strip the ugly traceback and show just the message
-            clean_msg = result['message'].replace("❌", "").replace("FAIL:", ">>")
-            console.insert("end", clean_msg, "fail")
-
-        db.log_attempt(problem_id, result['success'], result['message'])
-        console.configure(state="disabled")
+            # TIMEOUT / MEMORY-LIMIT / CANCELLED / crashes, or tests that never ran
+            self.write_run(run, f"\n[{result['outcome']}]\n", "fail")
+            self.write_run(run, result['message'], "fail")
+
+        if result['memory']:
+            self.write_run(run, "\n" + runner.format_memory(result['memory']) + "\n", "info")
+
+        if result['outcome'] != runner.OUTCOME_CANCELLED:
+            alog.log_attempt(problem_id, result['success'], result['message'],
+                             cases=result['cases'], cached=result['cached'], outcome=result['outcome'],
+                             memory=result['memory'], user_id=run["user_id"])
+
+    def profile_gui(self, problem_id, console):
+        user_id = db.get_current_user()  # The profile may be switched before the job ends
+        self.start_job(console, "Timing your solution on growing inputs...\n",
+                       lambda: cx.profile_solution(problem_id, user_id=user_id), self.render_profile)
+
+    def render_profile(self, outcome):
+        profile, error = outcome
+        if not profile:
+            return f"\n{error}\n", "fail"
+        slower = profile['verdict'].startswith("Asymptotically slower")
+        return cx.format_profile(profile) + "\n", "fail" if slower else "pass"
+
+    def fuzz_gui(self, problem_id, console):
+        self.start_job(console, f"Comparing your solution with the reference on {fuzz.FUZZ_CASES} random inputs...\n",
+                       lambda: fuzz.fuzz_solution(problem_id), self.render_fuzz_report)
+
+    def render_fuzz_report(self, outcome):
+        report, error = outcome
+        if not report:
+            return f"\n{error}\n", "fail"
+        return fuzz.format_report(report) + "\n", "fail" if report['divergence'] else "pass"
 
     def show_history(self, problem_id, console):
-        history = db.get_problem_history(problem_id)
+        stats = db.get_problem_stats(problem_id)
+        self.detach_console(console)
         console.configure(state="normal")
         console.delete("0.0", "end")
         
-        if not history:
+        if not stats or not stats[2]:
+            self.history_view = None
             console.insert("0.0", "No attempts yet.", "info")
         else:
-            console.insert("end", f"HISTORY ({len(history)} attempts)\n\n", "info")
-            for attempt in history:
-                timestamp, success, error_msg = attempt
-                time_str = str(timestamp).split('.')[0]
-                
-                if success:
-                    console.insert("end", f"✔ {time_str}: SOLVED\n", "pass")
+            # stats[2] also counts attempts already compacted into daily rollups
+            logged = db.count_logged_attempts(problem_id)
+            summarized = f", {stats[2] - logged} older ones summarized by day" if stats[2] > logged else ""
+            console.insert("end", f"HISTORY ({logged} attempts{summarized})\n", "info")
+            trend = db.get_memory_trend(problem_id)
+            if trend:
+                console.insert("end", "Memory trend (peak): " + " → ".join(db.format_bytes(row[2]) for row in trend) + "\n", "info")
+            console.insert("end", "\n")
+            # Only the first page is rendered now; older ones load as you scroll
+            self.history_view = {"problem_id": problem_id, "console": console, "cursor": None}
+            self.load_history_page()
+
+        console.configure(state="disabled")
+
+    def load_history_page(self):
+        """Appends the next page of the Mistake Log to the console."""
+        view = self.history_view
+        page, view["cursor"] = db.get_problem_history_page(view["problem_id"], before=view["cursor"])
+        console = view["console"]
+        console.configure(state="normal")
+        for attempt in page:
+            timestamp, success, error_msg, peak_bytes, attempt_id = attempt
+            time_str = db.format_timestamp(timestamp)
+            memory = f"  [{db.format_bytes(peak_bytes)} peak]" if peak_bytes is not None else ""
+            
+            if success:
+                console.insert("end", f"✔ {time_str}: SOLVED{memory}\n", "pass")
+            else:
+                console.insert("end", f"✘ {time_str}: FAILED{memory}\n", "fail")
+                failed_cases = runner.failed_case_lines(db.get_attempt_cases(attempt_id))
+                if failed_cases:
+                    console.insert("end", "".join(f"   {line}\n" for line in failed_cases), "fail")
                 else:
-                    console.insert("end", f"✘ {time_str}: FAILED\n", "fail")
-                    # Clean up error msg
+                    # No test case ran (syntax/import error, crash): clean up error msg
                     short_err = error_msg.split('\n')[0] if error_msg else "Unknown Error"
                     console.insert("end", f"   {short_err}...\n", "fail")
-                console.insert("end", "-"*20 + "\n")
-
+            console.insert("end", "-"*20 + "\n")
         console.configure(state="disabled")
 
+        if view["cursor"] is not None:
+            self.after(200, self.poll_history_scroll, view)
+
+    def poll_history_scroll(self, view):
+        """Loads the next page once the user scrolls near the bottom of the log."""
+        if view is not self.history_view or not view["console"].winfo_exists():
+            return  # Console was reused (test run, other problem) or closed
+        if view["console"].yview()[1] > 0.9:
+            self.load_history_page()
+        else:
+            self.after(200, self.poll_history_scroll, view)
+
     # --- VIEW: RECYCLE BIN ---
     # --- VIEW: RECYCLE BIN ---
     def show_recycle_bin_view(self):
@@ -672,17 +941,16 @@ class DSAApp(ctk.CTk):
                 # We need to find the matching HTML in 'questions/' to get the metadata
                 html_found = False
                 
-                # Attempt to find matching HTML
-                if os.path.exists("questions"):
-                    # 1. Try simple name match (Square.py -> Square.html)
-                    simple_html = filename.replace('.py', '.html')
-                    if os.path.exists(os.path.join("questions", simple_html)):
-                        self.process_restore_html(os.path.join("questions", simple_html), filename)
-                        html_found = True
-                    else:
-                        # 2. Harder search: Scan all HTMLs for title match (Backup plan)
-                        # (Simplified for now to rely on Case A being done first usually)
-                        pass 
+                # Look up the matching HTML via the problem index (no folder scan)
+                match = db.find_problem_by_filename(filename)
+                html_path = match[2] if match else None
+                if not (html_path and os.path.exists(html_path)):
+                    # Not indexed (e.g. its problem was deleted): try the simple name match
+                    # (Square.py -> Square.html)
+                    html_path = os.path.join("questions", filename.replace('.py', '.html'))
+                if os.path.exists(html_path):
+                    self.process_restore_html(html_path, filename)
+                    html_found = True
 
                 if html_found:
                     messagebox.showinfo("Success", f"Restored Solution '{filename}'!")
@@ -700,27 +968,8 @@ class DSAApp(ctk.CTk):
     def process_restore_html(self, html_path, force_py_filename=None):
         """Helper to parse HTML and insert into DB."""
         try:
-            with open(html_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            match = re.search(r'const quizData = ({.*?});', content, re.DOTALL)
-            if match:
-                data = json.loads(match.group(1))
-                title = data['title']
-                
-                # Determine Python filename
-                if force_py_filename:
-                    py_filename = force_py_filename
-                else:
-                    # Generate standard name
-                    clean_name = re.sub(r'^\d+\s*', '', title) 
-                    py_filename = re.sub(r'[^\w\s-]', '', clean_name).strip().replace(' ', '_') + ".py"
-                
-                cleanr = re.compile('<.*?>')
-                instructions = re.sub(cleanr, '', data['instructions']).strip()
-                test_code = data['tests'][0]['content']
-                stub = "pass" # Default stub
-                
-                db.upsert_problem(title, py_filename, instructions, stub, test_code)
+            # None = Let the ingestion engine guess the python filename
+            ingest.ingest_html_files([html_path], force_py_filename=force_py_filename)
         except Exception as e:
             print(f"Error parsing HTML during restore: {e}")
 
@@ -744,11 +993,9 @@ class DSAApp(ctk.CTk):
             return
 
         # 2. Fetch original stub from Database
-        conn = db.get_connection()
-        c = conn.cursor()
-        c.execute("SELECT title, solution_stub FROM problems WHERE id = ?", (problem_id,))
-        row = c.fetchone()
-        conn.close()
+        with db.transaction() as c:
+            c.execute("SELECT title, solution_stub FROM problems WHERE id = ?", (problem_id,))
+            row = c.fetchone()
 
         # 3. Overwrite the file
         if row:
@@ -775,5 +1022,10 @@ class DSAApp(ctk.CTk):
         messagebox.showinfo("Saved", "Notes updated successfully!")
 if __name__ == "__main__":
     db.init_db()
+    if "--no-cache" in sys.argv:
+        runner.RESULT_CACHE_ENABLED = False
+    if "--profile-memory" in sys.argv:
+        runner.PROFILE_MEMORY = True
+    runner.get_pool(size=GUI_PARALLEL_RUNS)  # Warm the test workers while the window comes up
     app = DSAApp()
     app.mainloop()
\ No newline at end of file
@@ -1,48 +1,272 @@
 import subprocess
 import sys
 import os
+import shutil
+import tempfile
+import io
+import json
+import time
+import types
+import atexit
+import unittest
+import importlib
+import threading
+import math
+import signal
+import hashlib
+import inspect
+import linecache
+import functools
+import platform
+import tracemalloc
+import traceback
+import contextlib
+
+import database_manager as db
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Windows: only the wall-clock and output limits apply
 
 TEST_TEMP_FILE = "evaluate_temp.py"
 
-def run_test_module(test_code, user_filename):
-    """Runs the test code against the user's specific file in the solutions folder."""
-    
+# Warm workers kept alive for test runs (see WorkerPool)
+POOL_SIZE = 1
+# Recycle a worker after this many runs (user code can leave state behind)
+MAX_RUNS_PER_WORKER = 50
+SOLUTIONS_PACKAGE = "solutions"
+
+# Resource limits for every run (override per pool/run with a partial dict)
+DEFAULT_LIMITS = {
+    "wall_seconds": 10.0,       # Enforced by the parent: the worker is killed
+    "cpu_seconds": 5,           # RLIMIT_CPU in the worker
+    "memory_mb": 512,           # RLIMIT_AS in the worker
+    "output_bytes": 64 * 1024,  # Captured stdout/stderr is truncated past this
+}
+
+# Set to True (e.g. --profile-memory) to measure memory on every run (see MemoryProbe)
+PROFILE_MEMORY = False
+# Allocation sites kept per memory profile
+MEMORY_TOP_SITES = 5
+
+# What happened to a run (stored in attempts.outcome)
+OUTCOME_PASS, OUTCOME_FAIL, OUTCOME_CRASH = "PASS", "FAIL", "CRASH"
+OUTCOME_TIMEOUT, OUTCOME_MEMORY_LIMIT = "TIMEOUT", "MEMORY-LIMIT"
+OUTCOME_CANCELLED = "CANCELLED"  # Stopped by the user (not logged as an attempt)
+
+# Streaming: workers send captured output in chunks of about this size / age
+STREAM_CHUNK_CHARS = 512
+STREAM_INTERVAL = 0.05
+# How often the watchdog checks a running test for timeout/cancellation (seconds)
+WATCHDOG_INTERVAL = 0.05
+# Before killing a worker (timeout/Stop), give it this long to stream its last output
+KILL_GRACE_SECONDS = 2 * STREAM_INTERVAL
+
+# Per-test-case statuses (see CaseRecorder)
+CASE_PASS, CASE_FAIL, CASE_ERROR, CASE_SKIP = "pass", "fail", "error", "skip"
+
+# Set to False (e.g. --no-cache) to always run the tests
+RESULT_CACHE_ENABLED = True
+# Cache entries are only valid for the interpreter that produced them
+PYTHON_VERSION = f"{platform.python_implementation()} {platform.python_version()}"
+
+# Every run gets its own scratch directory under here (removed afterwards)
+RUNS_DIR = os.path.join(tempfile.gettempdir(), "dsa_tracker_runs")
+# Scratch directories older than this were left by a killed process
+STALE_RUN_SECONDS = 3600
+
+
+def patch_test_code(test_code, user_filename):
+    """Points the test's 'from exercise import' at the user's solution module."""
     # Remove .py to get module name (e.g. "Square_Pattern")
     module_name = user_filename.replace('.py', '')
-    
+
     # CRITICAL CHANGE: We import from the 'solutions' package
     # "from exercise import..."  becomes  "from solutions.Square_Pattern import..."
-    patched_code = test_code.replace("from exercise import", f"from solutions.{module_name} import")
+    return test_code.replace("from exercise import", f"from {SOLUTIONS_PACKAGE}.{module_name} import")
 
-    with open(TEST_TEMP_FILE, 'w') as f:
-        f.write(patched_code)
+def run_test_module(test_code, user_filename, use_cache=True, profile_memory=None, on_event=None, cancel=None):
+    """
+    Runs the test code against the user's specific file in the solutions folder.
+    Uses a warm worker from the shared pool, or the result cache when
+    neither the solution nor the tests changed since the last run. If no
+    test process can be started, that is reported as a crashed run.
+    profile_memory (default PROFILE_MEMORY): also measure memory; such runs
+    use a fresh interpreter (so max RSS belongs to this run) and skip the cache.
+    on_event: called (from this thread) with every streamed worker event:
+    {"event": "output", "text"} and {"event": "case", "case"}.
+    cancel: a threading.Event; setting it stops the run (outcome CANCELLED).
+    """
+    try:
+        if PROFILE_MEMORY if profile_memory is None else profile_memory:
+            return run_test_module_subprocess(test_code, user_filename, profile_memory=True,
+                                              on_event=on_event, cancel=cancel)
+        return run_cached(get_pool().run, test_code, user_filename, use_cache, on_event=on_event, cancel=cancel)
+    except OSError as e:
+        return crash_result(WorkerCrashed(f"could not start a test process: {e}"))
 
-    result = subprocess.run(
-        [sys.executable, TEST_TEMP_FILE],
-        capture_output=True,
-        text=True
-    )
+def run_cached(run, test_code, user_filename, use_cache=True, **options):
+    """
+    Calls run(test_code, user_filename, **options) unless the result cache
+    already holds the result for this solution source + test code + Python
+    version. Results from the cache have "cached" set.
+    """
+    key = result_cache_key(test_code, user_filename) if use_cache and RESULT_CACHE_ENABLED else None
+    if key:
+        cached = db.get_cached_result(*key)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+
+    result = run(test_code, user_filename, **options)
+    # Only plain pass/fail results are cached (not crashes or limits), and not if the file changed mid-run
+    if key and result["outcome"] in (OUTCOME_PASS, OUTCOME_FAIL) and result_cache_key(test_code, user_filename) == key:
+        db.store_cached_result(*key, result)
+    return result
 
-    if os.path.exists(TEST_TEMP_FILE):
-        os.remove(TEST_TEMP_FILE)
+def result_cache_key(test_code, user_filename):
+    """(source_hash, test_hash, python_version), or None if the solution file is missing."""
+    try:
+        with open(os.path.join(SOLUTIONS_PACKAGE, user_filename), "rb") as f:
+            source_hash = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return None
+    # Hash the patched code, so the same tests against another file don't collide
+    test_hash = hashlib.sha256(patch_test_code(test_code, user_filename).encode("utf-8")).hexdigest()
+    return source_hash, test_hash, PYTHON_VERSION
 
-    is_success = (result.returncode == 0)
-    
+def run_test_module_subprocess(test_code, user_filename, limits=None, profile_memory=False, on_event=None,
+                               cancel=None):
+    """Runs the tests in a brand-new interpreter (no warm pool; one worker, one run)."""
+    limits = resolve_limits(limits)
+    worker = Worker()
+    try:
+        with scratch_dir() as run_dir:
+            reply = worker.run(test_code, user_filename, run_dir, limits, profile_memory, on_event, cancel)
+    except WorkerCrashed as e:
+        return crash_result(e)
+    finally:
+        worker.stop()
+    return result_from_reply(reply)
+
+def resolve_limits(limits=None):
+    """DEFAULT_LIMITS with the given keys overridden (a value of None = unlimited)."""
+    return dict(DEFAULT_LIMITS, **(limits or {}))
+
+@contextlib.contextmanager
+def scratch_dir():
+    """A private directory for one run; removed afterwards, whatever happens."""
+    os.makedirs(RUNS_DIR, exist_ok=True)
+    path = tempfile.mkdtemp(prefix="run_", dir=RUNS_DIR)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def remove_stale_scratch_dirs():
+    """Deletes scratch directories left behind by processes that were killed mid-run."""
+    cutoff = time.time() - STALE_RUN_SECONDS
+    try:
+        entries = list(os.scandir(RUNS_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        except OSError:
+            pass
+
+def solutions_env():
+    """Environment for test processes: only the project root (with solutions/) on PYTHONPATH."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.getcwd()
+    return env
+
+def build_result(is_success, raw_error, duration, tests_run=None, failures=None, errors=None, cases=None,
+                 outcome=None, memory=None):
+    """
+    The dict every run returns (message is what the CLI/GUI show).
+    cases: per-test-case records from CaseRecorder (empty if the tests never ran).
+    outcome: one of the OUTCOME_* values (default: PASS/FAIL from is_success);
+    for TIMEOUT/MEMORY-LIMIT raw_error is the explanation shown to the user.
+    memory: MemoryProbe.summary() of a memory-profiled run, else None.
+    """
+    cases = cases or []
+    outcome = outcome or (OUTCOME_PASS if is_success else OUTCOME_FAIL)
     if is_success:
         message = "✅ All tests passed!"
+    elif outcome in (OUTCOME_TIMEOUT, OUTCOME_MEMORY_LIMIT, OUTCOME_CANCELLED):
+        message = f"⛔ {outcome}: {raw_error}"
+        if cases:
+            message += "\n" + format_case_results(cases)
+    elif any(case["status"] in (CASE_FAIL, CASE_ERROR) for case in cases):
+        message = format_case_results(cases)
     else:
-        message = format_error_message(result.stderr)
+        # Nothing ran (syntax/import error, crash): show the raw traceback tail
+        message = format_error_message(raw_error)
 
     return {
         "success": is_success,
-        "message": message
+        "message": message,
+        "tests_run": tests_run,
+        "failures": failures,
+        "errors": errors,
+        "duration": duration,
+        "cases": cases,
+        "cached": False,
+        "outcome": outcome,
+        "memory": memory,
     }
 
+def result_from_reply(reply):
+    if reply["memory_exceeded"]:
+        return build_result(False, f"the solution needed more than {reply['memory_mb']} MB", reply["duration"],
+                            reply["tests_run"], reply["failures"], reply["errors"], reply["cases"],
+                            outcome=OUTCOME_MEMORY_LIMIT)
+    return build_result(reply["success"], reply["output"], reply["duration"],
+                        reply["tests_run"], reply["failures"], reply["errors"], reply["cases"],
+                        memory=reply["memory"])
+
+def format_memory(memory):
+    """Multi-line summary of a memory profile (peak, max RSS, top allocation sites)."""
+    lines = [f"🧠 Peak traced memory: {db.format_bytes(memory['peak_bytes'])}"
+             f"  |  Max RSS: {db.format_bytes(memory['max_rss_kb'] * 1024) if memory['max_rss_kb'] else 'n/a'}"
+             f"  |  Live blocks from your code: {memory['alloc_blocks']}"]
+    for site, line, size, count in memory["top_sites"]:
+        lines.append(f"   {db.format_bytes(size):>9} in {count:>5} blocks  {site}  {line}")
+    return "\n".join(lines)
+
+def crash_result(crash):
+    """Result for a run whose worker died (killed for a limit, or crashed)."""
+    if crash.outcome in (OUTCOME_TIMEOUT, OUTCOME_CANCELLED):
+        return build_result(False, str(crash), crash.duration, outcome=crash.outcome)
+    return build_result(False, f"Test process crashed ({crash})", crash.duration, outcome=OUTCOME_CRASH)
+
+def format_case_results(cases):
+    """Renders the failed/errored test cases (no output parsing needed)."""
+    lines = []
+    for case in cases:
+        if case["status"] not in (CASE_FAIL, CASE_ERROR):
+            continue
+        failed = case["status"] == CASE_FAIL
+        detail = case["detail"].splitlines() or [""]
+        lines.append(f"\n{'🔻 FAILED TEST CASE' if failed else '💥 ERROR IN TEST CASE'}: {case['name']}")
+        lines.append(f"   ⚠️  {'Mismatch' if failed else 'Error'}: {detail[0]}")
+        lines.extend(f"      {line}" for line in detail[1:])
+    return "\n".join(lines)
+
+def failed_case_lines(cases):
+    """'Class.method: first detail line' per failed/errored row of db.get_attempt_cases()."""
+    return [f"{name}: {detail.splitlines()[0] if detail else status}"
+            for name, status, _, detail in cases if status in (CASE_FAIL, CASE_ERROR)]
+
 def format_error_message(raw_error):
-    """Parses the messy stderr from unittest."""
+    """Parses the messy stderr from unittest (used when no test case ran)."""
     lines = raw_error.split('\n')
     clean_output = []
-    
+
     for line in lines:
         line = line.strip()
         if line.startswith("FAIL:"):
@@ -51,8 +275,690 @@ def format_error_message(raw_error):
         elif line.startswith("AssertionError:"):
             diff = line.replace("AssertionError: ", "")
             clean_output.append(f"   ⚠️  Mismatch: {diff}")
-            
+
     if not clean_output:
         return "⚠️ Error details:\n" + "\n".join(lines[-5:])
-        
-    return "\n".join(clean_output)
\ No newline at end of file
+
+    return "\n".join(clean_output)
+
+
+# --- WARM WORKER POOL ---
+class WorkerCrashed(Exception):
+    """The worker died mid-run; outcome says why (OUTCOME_TIMEOUT, OUTCOME_CANCELLED or OUTCOME_CRASH)."""
+
+    def __init__(self, message, outcome=OUTCOME_CRASH, duration=0.0):
+        super().__init__(message)
+        self.outcome = outcome
+        self.duration = duration
+
+
+class Worker:
+    """
+    One warm interpreter running this file with --worker.
+    Requests and replies are JSON lines over its stdin/stdout.
+    """
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--worker", os.getcwd()],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            cwd=os.getcwd(),
+            env=solutions_env(),
+        )
+        self.runs = 0
+        self.ready = False
+        self.kill_reason = None  # Set by the watchdog: OUTCOME_TIMEOUT or OUTCOME_CANCELLED
+
+    def wait_ready(self):
+        """Blocks until the worker has finished its imports."""
+        if not self.ready:
+            self._read_reply()  # Startup handshake
+            self.ready = True
+
+    def run(self, test_code, user_filename, run_dir, limits, profile_memory=False, on_event=None, cancel=None):
+        """
+        Runs one test module. limits: a resolve_limits() dict; the wall-clock
+        limit (and 'cancel') are enforced here by killing the worker.
+        """
+        return self.request({"test_code": test_code, "filename": user_filename, "run_dir": run_dir,
+                             "profile_memory": profile_memory}, limits, on_event, cancel)
+
+    def run_task(self, module, function, kwargs, run_dir, limits):
+        """Calls module.function(**kwargs) in the worker; kwargs and the return value must be JSON."""
+        return self.request({"task": [module, function], "kwargs": kwargs, "run_dir": run_dir}, limits)
+
+    def request(self, request, limits, on_event=None, cancel=None):
+        try:
+            self.wait_ready()
+        except (OSError, ValueError) as e:
+            raise WorkerCrashed(str(e))
+        request = dict(request, limits=limits)
+        self.kill_reason = None
+        done = threading.Event()
+        watchdog = None
+        if limits["wall_seconds"] or cancel is not None:
+            watchdog = threading.Thread(target=self._watch, args=(limits["wall_seconds"], cancel, done), daemon=True)
+        start = time.perf_counter()
+        try:
+            self.process.stdin.write(json.dumps(request) + "\n")
+            self.process.stdin.flush()
+            if watchdog:
+                watchdog.start()
+            reply = self._read_reply(on_event)
+        except (OSError, ValueError, WorkerCrashed) as e:
+            done.set()
+            raise self._explain_crash(e, limits, time.perf_counter() - start)
+        finally:
+            done.set()
+        self.runs += 1
+        return reply
+
+    def _watch(self, wall_seconds, cancel, done):
+        """Kills the worker when the run passes wall_seconds or 'cancel' is set."""
+        deadline = time.monotonic() + wall_seconds if wall_seconds else None
+        while not done.wait(WATCHDOG_INTERVAL):
+            if cancel is not None and cancel.is_set():
+                self.kill_reason = OUTCOME_CANCELLED
+            elif deadline is not None and time.monotonic() >= deadline:
+                self.kill_reason = OUTCOME_TIMEOUT
+            else:
+                continue
+            # A moment for the worker's event-stream thread to send its pending output
+            if not done.wait(KILL_GRACE_SECONDS):
+                self.process.kill()
+            return
+
+    def _explain_crash(self, error, limits, duration):
+        """Turns a dead worker into a WorkerCrashed that says which limit (if any) killed it."""
+        self.process.kill()
+        code = self.process.wait()
+        if self.kill_reason == OUTCOME_CANCELLED:
+            return WorkerCrashed("stopped by the user", OUTCOME_CANCELLED, duration)
+        if self.kill_reason == OUTCOME_TIMEOUT:
+            return WorkerCrashed(f"stopped after {limits['wall_seconds']:g}s (wall clock)", OUTCOME_TIMEOUT, duration)
+        if hasattr(signal, "SIGXCPU") and code == -signal.SIGXCPU:
+            return WorkerCrashed(f"stopped after {limits['cpu_seconds']:g}s of CPU time", OUTCOME_TIMEOUT, duration)
+        return WorkerCrashed(str(error), OUTCOME_CRASH, duration)
+
+    def _read_reply(self, on_event=None):
+        """Reads up to the next reply, passing streamed events to on_event."""
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise WorkerCrashed(f"worker exited with code {self.process.wait()}")
+            message = json.loads(line)
+            if "event" not in message:
+                return message
+            if on_event:
+                on_event(message)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def stop(self):
+        if self.alive():
+            try:
+                self.process.stdin.close()
+                self.process.wait(timeout=1)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+                self.process.wait()
+
+
+class WorkerPool:
+    """
+    Pre-started interpreters that have already imported unittest and the
+    solutions package, so a test run skips interpreter startup.
+    Workers are replaced after max_runs runs or when they crash.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_runs=MAX_RUNS_PER_WORKER, limits=None):
+        self.size = size
+        self.max_runs = max_runs
+        self.limits = resolve_limits(limits)
+        self._idle = []
+        self._busy = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        atexit.register(self.close)
+
+    def start(self):
+        """Pre-forks the workers (they warm up in the background)."""
+        remove_stale_scratch_dirs()
+        with self._cond:
+            while len(self._idle) + self._busy < self.size:
+                self._idle.append(Worker())
+        return self
+
+    def wait_ready(self):
+        """Blocks until every idle worker is warm (so timings exclude startup)."""
+        with self._cond:
+            idle = list(self._idle)
+        for worker in idle:
+            try:
+                worker.wait_ready()
+            except (WorkerCrashed, OSError, ValueError):
+                pass  # Replaced on first use
+        return self
+
+    def run(self, test_code, user_filename, limits=None, on_event=None, cancel=None):
+        """
+        Runs one test module on a warm worker and returns the result dict.
+        Safe to call from many threads; each run works in its own scratch directory.
+        limits: overrides for this run on top of the pool's limits.
+        on_event/cancel: see run_test_module().
+        """
+        limits = dict(self.limits, **(limits or {}))
+        try:
+            worker = self._acquire()
+        except OSError as e:
+            return crash_result(WorkerCrashed(f"could not start a test process: {e}"))
+        try:
+            with scratch_dir() as run_dir:
+                reply = worker.run(test_code, user_filename, run_dir, limits, on_event=on_event, cancel=cancel)
+            if reply["memory_exceeded"]:
+                worker.stop()  # A MemoryError can leave the interpreter in a bad state
+                worker = None
+            return result_from_reply(reply)
+        except WorkerCrashed as e:
+            worker.stop()
+            worker = None
+            return crash_result(e)
+        except BaseException as e:
+            # Interrupted mid-request, the worker's state is unknown: never reuse it
+            worker.stop()
+            worker = None
+            if isinstance(e, OSError):
+                return crash_result(WorkerCrashed(f"could not set up the run: {e}"))
+            raise
+        finally:
+            self._release(worker)
+
+    def run_task(self, module, function, kwargs=None, limits=None):
+        """
+        Calls module.function(**kwargs) on a warm worker, under the same
+        limits as a test run (used by the profilers, which run user code).
+        Returns {"value", "error", "outcome"}; value is None if the call failed.
+        """
+        limits = dict(self.limits, **(limits or {}))
+        try:
+            worker = self._acquire()
+        except OSError as e:
+            return {"value": None, "error": f"could not start a worker process: {e}", "outcome": OUTCOME_CRASH}
+        try:
+            with scratch_dir() as run_dir:
+                reply = worker.run_task(module, function, kwargs or {}, run_dir, limits)
+            if reply["memory_exceeded"]:
+                worker.stop()
+                worker = None
+        except WorkerCrashed as e:
+            worker.stop()
+            worker = None
+            return {"value": None, "error": str(e), "outcome": e.outcome}
+        except BaseException as e:
+            worker.stop()
+            worker = None
+            if isinstance(e, OSError):
+                return {"value": None, "error": f"could not set up the run: {e}", "outcome": OUTCOME_CRASH}
+            raise
+        finally:
+            self._release(worker)
+
+        if reply["memory_exceeded"]:
+            return {"value": None, "error": f"the solution needed more than {limits['memory_mb']} MB",
+                    "outcome": OUTCOME_MEMORY_LIMIT}
+        return {"value": reply["value"], "error": reply["error"],
+                "outcome": OUTCOME_CRASH if reply["error"] else OUTCOME_PASS}
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._busy >= self.size:
+                self._cond.wait()
+            self._busy += 1
+            worker = self._idle.pop() if self._idle else None
+        if worker is not None and not worker.alive():
+            worker.process.wait()  # Reap the dead worker before replacing it
+            worker = None
+        if worker is None:
+            try:
+                worker = Worker()
+            except OSError:
+                self._release(None, replace=False)
+                raise
+        return worker
+
+    def _release(self, worker, replace=True):
+        """Returns a worker to the pool; a stopped one (None) is replaced by a fresh interpreter."""
+        if worker and (worker.runs >= self.max_runs or self._closed):
+            worker.stop()  # Recycle: the next run gets a fresh interpreter
+            worker = None
+        if worker is None and replace and not self._closed:
+            try:
+                worker = Worker()  # Warms up while the caller handles the result
+            except OSError:
+                worker = None  # The next _acquire tries again
+        with self._cond:
+            self._busy -= 1
+            if worker:
+                self._idle.append(worker)
+            self._cond.notify()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool(size=POOL_SIZE):
+    """
+    The shared pool (created and pre-forked on first use). Asking for a
+    larger size lets it grow; extra workers start when runs overlap.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(size=size).start()
+        elif size > _pool.size:
+            with _pool._cond:
+                _pool.size = size
+                _pool._cond.notify_all()
+        return _pool
+
+
+# --- WORKER PROCESS ---
+class CaseRecorder(unittest.TestResult):
+    """
+    TestResult that keeps one compact record per test case:
+    {"name", "status", "duration", "detail"} (detail = assertion diff or error).
+    Names are "Class.method", so same-named tests in two classes stay apart.
+    """
+
+    def __init__(self, detail_limit=None, on_case=None):
+        super().__init__()
+        self.cases = []
+        self.memory_exceeded = False
+        self.detail_limit = detail_limit
+        self.on_case = on_case  # Called with each record as soon as it is known
+        self._started = 0.0
+
+    def startTest(self, test):
+        super().startTest(test)
+        self._started = time.perf_counter()
+
+    def _record(self, test, status, detail=""):
+        self._add({"name": case_name(test), "status": status, "detail": detail[:self.detail_limit],
+                   "duration": time.perf_counter() - self._started})
+
+    def _add(self, case):
+        self.cases.append(case)
+        if self.on_case:
+            self.on_case(case)
+
+    def addSuccess(self, test):
+        super().addSuccess(test)
+        self._record(test, CASE_PASS)
+
+    def addFailure(self, test, err):
+        super().addFailure(test, err)
+        self._record(test, CASE_FAIL, str(err[1]))
+
+    def addError(self, test, err):
+        super().addError(test, err)
+        self.memory_exceeded |= issubclass(err[0], MemoryError)
+        self._record(test, CASE_ERROR, describe_error(err))
+
+    def addSkip(self, test, reason):
+        super().addSkip(test, reason)
+        self._record(test, CASE_SKIP, reason)
+
+    def addExpectedFailure(self, test, err):
+        super().addExpectedFailure(test, err)
+        self._record(test, CASE_PASS)
+
+    def addUnexpectedSuccess(self, test):
+        super().addUnexpectedSuccess(test)
+        self._record(test, CASE_FAIL, "unexpected success")
+
+    def addSubTest(self, test, subtest, err):
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            self.memory_exceeded |= issubclass(err[0], MemoryError)
+            detail = str(err[1]) if failed else describe_error(err)
+            self._add({"name": f"{case_name(test)} {subtest._subDescription()}",
+                       "status": CASE_FAIL if failed else CASE_ERROR,
+                       "detail": detail[:self.detail_limit],
+                       "duration": time.perf_counter() - self._started})
+
+def case_name(test):
+    """'Class.method' for a test case; str(test) for placeholders like a failed setUpClass."""
+    method = getattr(test, "_testMethodName", None)
+    return f"{type(test).__qualname__}.{method}" if method else str(test)
+
+def describe_error(err):
+    """'ValueError: bad input (Square.py:12 in generate_square)' for an exception tuple."""
+    exc_type, value, tb = err
+    detail = "".join(traceback.format_exception_only(exc_type, value)).strip()
+    frames = traceback.extract_tb(tb)
+    if frames:
+        frame = frames[-1]
+        detail += f" ({os.path.basename(frame.filename)}:{frame.lineno} in {frame.name})"
+    return detail
+
+class MemoryProbe:
+    """
+    tracemalloc for one run: the peak traced memory of the whole suite, and
+    the allocation sites in the solution file whose blocks are still alive
+    when a solution function returns (i.e. what its result is made of),
+    merged over every call.
+    """
+
+    def __init__(self, solution_file, top=MEMORY_TOP_SITES):
+        self.solution_file = solution_file
+        self.top = top
+        self.sites = {}
+
+    def wrap_solution_functions(self, namespace):
+        """Routes the test module's calls to solution functions through the probe."""
+        for name, value in list(namespace.items()):
+            if inspect.isfunction(value) and value.__module__.startswith(SOLUTIONS_PACKAGE + "."):
+                namespace[name] = self._probed(value)
+
+    def _probed(self, function):
+        @functools.wraps(function)
+        def call(*args, **kwargs):
+            result = function(*args, **kwargs)
+            self._record_live_sites()  # 'result' is still referenced here
+            return result
+        return call
+
+    def _record_live_sites(self):
+        snapshot = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(True, self.solution_file)])
+        for stat in snapshot.statistics("lineno"):
+            frame = stat.traceback[0]
+            size, count = self.sites.get((frame.filename, frame.lineno), (0, 0))
+            self.sites[(frame.filename, frame.lineno)] = (max(size, stat.size), max(count, stat.count))
+
+    def start(self):
+        tracemalloc.start()
+
+    def stop(self):
+        """Stops tracing and returns the summary dict stored with the attempt."""
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else 0
+        tracemalloc.stop()
+        max_rss_kb = None
+        if resource is not None:
+            max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            if sys.platform == "darwin":
+                max_rss_kb //= 1024  # macOS reports bytes
+        top = sorted(self.sites.items(), key=lambda item: item[1][0], reverse=True)[:self.top]
+        return {
+            "peak_bytes": peak,
+            "max_rss_kb": max_rss_kb,
+            "alloc_blocks": sum(count for _, count in self.sites.values()),
+            "alloc_bytes": sum(size for size, _ in self.sites.values()),
+            "top_sites": [[f"{os.path.basename(filename)}:{lineno}", linecache.getline(filename, lineno).strip(),
+                           size, count] for (filename, lineno), (size, count) in top],
+        }
+
+class LimitedOutput(io.StringIO):
+    """
+    Captured stdout/stderr that stops growing after 'limit' characters.
+    on_write (optional) sees every piece of text that is kept.
+    """
+
+    def __init__(self, limit=None, on_write=None):
+        super().__init__()
+        self.limit = limit
+        self.truncated = False
+        self.on_write = on_write
+
+    def write(self, text):
+        if self.limit is not None and self.tell() + len(text) > self.limit:
+            if not self.truncated:
+                self._keep(text[:max(0, self.limit - self.tell())] + "\n... [output truncated]\n")
+                self.truncated = True
+            return len(text)
+        self._keep(text)
+        return len(text)
+
+    def _keep(self, text):
+        super().write(text)
+        if self.on_write:
+            self.on_write(text)
+
+class EventStream:
+    """
+    Worker side of streaming: batches captured output into
+    {"event": "output"} messages and sends {"event": "case"} records,
+    keeping both in order. A background thread flushes output every
+    STREAM_INTERVAL, so a test that prints and then hangs has its output
+    sent before the worker is killed.
+    """
+
+    def __init__(self, send):
+        self.send = send
+        self._pending = []
+        self._size = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self._flush_periodically, name="event-stream", daemon=True).start()
+
+    def output(self, text):
+        with self._lock:
+            self._pending.append(text)
+            self._size += len(text)
+            if self._size >= STREAM_CHUNK_CHARS:
+                self._flush()
+
+    def case(self, case):
+        with self._lock:
+            self._flush()
+            self.send({"event": "case", "case": case})
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            self.send({"event": "output", "text": "".join(self._pending)})
+            self._pending, self._size = [], 0
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(STREAM_INTERVAL)
+            self.flush()
+
+@contextlib.contextmanager
+def resource_limits(cpu_seconds=None, memory_mb=None):
+    """
+    Applies RLIMIT_CPU / RLIMIT_AS (soft limits) to this worker for one run.
+    The CPU limit counts from the worker's current usage, since the process
+    is reused; going over it sends SIGXCPU, which kills the worker.
+    """
+    if resource is None:
+        yield
+        return
+
+    applied = []
+    if cpu_seconds:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        applied.append((resource.RLIMIT_CPU, math.ceil(usage.ru_utime + usage.ru_stime + cpu_seconds)))
+    if memory_mb:
+        applied.append((resource.RLIMIT_AS, memory_mb * 1024 * 1024))
+
+    previous = []
+    try:
+        for limit, value in applied:
+            soft, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            resource.setrlimit(limit, (value, hard))
+            previous.append((limit, (soft, hard)))
+        yield
+    finally:
+        for limit, old in previous:
+            resource.setrlimit(limit, old)
+
+def forget_solutions():
+    """Drops previously imported solutions so edits are picked up."""
+    for name in [m for m in sys.modules if m.startswith(SOLUTIONS_PACKAGE + ".")]:
+        del sys.modules[name]
+    importlib.invalidate_caches()
+
+def run_in_worker(test_code, user_filename, run_dir, root, limits, profile_memory=False, events=None):
+    """
+    Executes one test module inside the worker (fresh namespace, solution
+    re-imported), with run_dir as the working directory and the run's
+    CPU/memory/output limits applied.
+    profile_memory: trace the suite with a MemoryProbe (reply["memory"]).
+    events: an EventStream that output and case records are streamed to.
+    """
+    forget_solutions()
+
+    test_path = os.path.join(run_dir, TEST_TEMP_FILE)
+    module = types.ModuleType("evaluate_temp")
+    module.__file__ = test_path
+    output = LimitedOutput(limits["output_bytes"], on_write=events.output if events else None)
+    start = time.perf_counter()
+    tests_run = failures = errors = None
+    recorder = CaseRecorder(detail_limit=limits["output_bytes"], on_case=events.case if events else None)
+    probe = MemoryProbe(os.path.join(root, SOLUTIONS_PACKAGE, user_filename)) if profile_memory else None
+    memory = None
+    os.chdir(run_dir)  # Files the tests write stay private to this run
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            with resource_limits(limits["cpu_seconds"], limits["memory_mb"]):
+                exec(compile(patch_test_code(test_code, user_filename), test_path, "exec"), module.__dict__)
+                suite = unittest.defaultTestLoader.loadTestsFromModule(module)
+                if probe:
+                    # Traced from here on, so the peak is the tests, not the imports
+                    probe.wrap_solution_functions(module.__dict__)
+                    probe.start()
+                try:
+                    suite.run(recorder)
+                finally:
+                    if probe:
+                        memory = probe.stop()
+            success = recorder.wasSuccessful()
+            tests_run, failures, errors = recorder.testsRun, len(recorder.failures), len(recorder.errors)
+        except BaseException as e:
+            # Import/syntax errors in the solution, sys.exit() in user code...
+            recorder.memory_exceeded |= isinstance(e, MemoryError)
+            traceback.print_exc(file=output)
+            success = False
+        finally:
+            # Leave the scratch directory so the parent can delete it (Windows)
+            os.chdir(root)
+    if events:
+        events.flush()
+
+    return {"success": success, "output": output.getvalue(), "duration": time.perf_counter() - start,
+            "tests_run": tests_run, "failures": failures, "errors": errors, "cases": recorder.cases,
+            "memory_exceeded": recorder.memory_exceeded and bool(limits["memory_mb"]),
+            "memory_mb": limits["memory_mb"], "memory": memory}
+
+def run_task_in_worker(module, function, kwargs, run_dir, root, limits):
+    """Worker side of WorkerPool.run_task()."""
+    forget_solutions()
+    output = LimitedOutput(limits["output_bytes"])
+    value = error = None
+    memory_exceeded = False
+    os.chdir(run_dir)
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+        try:
+            with resource_limits(limits["cpu_seconds"], limits["memory_mb"]):
+                value = getattr(importlib.import_module(module), function)(**kwargs)
+        except BaseException as e:
+            memory_exceeded = isinstance(e, MemoryError)
+            error = "".join(traceback.format_exception_only(type(e), e)).strip()[:limits["output_bytes"]]
+        finally:
+            os.chdir(root)
+    return {"value": value, "error": error, "memory_exceeded": memory_exceeded and bool(limits["memory_mb"])}
+
+def worker_main(root):
+    """Request loop of a pool worker. root: the directory that contains solutions/."""
+    # Keep the protocol on a private copy of stdout; stray writes to fd 1 go nowhere
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, sys.stdout.fileno())
+
+    # Compile solutions from source every time: a quick edit can keep the
+    # same size and mtime second, which would make a cached .pyc look valid
+    sys.dont_write_bytecode = True
+    # Controlled import path: the project root instead of wherever this file lives
+    sys.path[0] = root
+    import solutions  # noqa: F401  (warm the package import)
+
+    send_lock = threading.Lock()  # The event-stream thread writes here too
+
+    def reply(message):
+        with send_lock:
+            protocol.write(json.dumps(message) + "\n")
+            protocol.flush()
+
+    reply({"ready": True})
+    events = EventStream(reply)
+    for line in sys.stdin:
+        request = json.loads(line)
+        if "task" in request:
+            module, function = request["task"]
+            reply(run_task_in_worker(module, function, request["kwargs"], request["run_dir"], root, request["limits"]))
+        else:
+            reply(run_in_worker(request["test_code"], request["filename"], request["run_dir"], root,
+                                request["limits"], request["profile_memory"], events))
+
+
+if __name__ == "__main__" and "--worker" in sys.argv:
+    worker_main(sys.argv[sys.argv.index("--worker") + 1])
+
+# --- BENCHMARK (warm pool vs. a fresh interpreter per run) ---
+elif __name__ == "__main__":
+    RUNS = 20
+    bench_file = "_bench_solution.py"
+    bench_path = os.path.join(SOLUTIONS_PACKAGE, bench_file)
+    bench_tests = (
+        "import unittest\n"
+        "from exercise import square\n\n"
+        "class TestSquare(unittest.TestCase):\n"
+        "    def test_square(self):\n"
+        "        self.assertEqual(square(3), 9)\n\n"
+        "if __name__ == '__main__':\n"
+        "    unittest.main()\n"
+    )
+    with open(bench_path, "w") as f:
+        f.write("def square(n):\n    return n * n\n")
+
+    try:
+        pool = WorkerPool().start()
+        pool.run(bench_tests, bench_file)  # Let the worker finish warming up
+
+        timings = {}
+        for name, run in (("subprocess", run_test_module_subprocess), ("warm pool", pool.run)):
+            start = time.perf_counter()
+            for _ in range(RUNS):
+                assert run(bench_tests, bench_file)["success"]
+            timings[name] = (time.perf_counter() - start) / RUNS * 1000
+
+        print(f"{'PATH':<12} | PER RUN")
+        print("-" * 26)
+        for name, ms in timings.items():
+            print(f"{name:<12} | {ms:>7.1f} ms")
+        print(f"\nSpeedup: {timings['subprocess'] / timings['warm pool']:.1f}x")
+
+        # A failing solution must still be reported (and the edit picked up)
+        with open(bench_path, "w") as f:
+            f.write("def square(n):\n    return n + n\n")
+        result = pool.run(bench_tests, bench_file)
+        print(f"After editing the solution -> success={result['success']}: {result['message'].strip()}")
+        pool.close()
+    finally:
+        os.remove(bench_path)
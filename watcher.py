@@ -0,0 +1,158 @@
+import os
+import sys
+import time
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+import ingestion as ingest
+
+# inotify flags (from <sys/inotify.h>)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+
+# struct inotify_event { int wd; uint32 mask; uint32 cookie; uint32 len; char name[]; }
+EVENT_HEADER = struct.Struct('iIII')
+
+DEBOUNCE_SECONDS = 0.5
+POLL_INTERVAL = 1.0
+
+
+def load_inotify():
+    """Returns libc with inotify support, or None (non-Linux, musl oddities...)."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class QuestionsWatcher:
+    """
+    Watches the questions folder in a background thread and live-ingests
+    changes. Uses inotify on Linux and falls back to polling elsewhere.
+    Bursts of events are debounced into one sync of just the affected files.
+
+    on_change(imported_titles, retired_titles) is called from the watcher
+    thread after every sync, so GUI callers must hop back to the Tk thread.
+    """
+
+    def __init__(self, questions_dir=ingest.QUESTIONS_DIR, on_change=None,
+                 debounce=DEBOUNCE_SECONDS, poll_interval=POLL_INTERVAL, force_polling=False):
+        self.questions_dir = questions_dir
+        self.on_change = on_change
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self.backend = None
+        self._pending = set()
+        self._last_event = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="questions-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    # --- BACKENDS ---
+    def _run(self):
+        libc = None if self.force_polling else load_inotify()
+        if libc and self._run_inotify(libc):
+            return
+        self._run_polling()
+
+    def _run_inotify(self, libc):
+        """Returns False if inotify could not be set up (caller falls back to polling)."""
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return False
+        if libc.inotify_add_watch(fd, os.fsencode(self.questions_dir), WATCH_MASK) < 0:
+            os.close(fd)
+            return False
+
+        self.backend = "inotify"
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], self._wait_time())
+                if ready:
+                    self._read_events(fd)
+                self._flush_if_quiet()
+        finally:
+            os.close(fd)
+        return True
+
+    def _read_events(self, fd):
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            _, _, _, name_len = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0").decode("utf-8", "surrogateescape")
+            offset += name_len
+            self._note(name)
+
+    def _run_polling(self):
+        self.backend = "polling"
+        snapshot = self._snapshot()
+        while not self._stop.wait(min(self.poll_interval, self._wait_time())):
+            current = self._snapshot()
+            for name in current.keys() | snapshot.keys():
+                if current.get(name) != snapshot.get(name):
+                    self._note(name)
+            snapshot = current
+            self._flush_if_quiet()
+
+    def _snapshot(self):
+        """{filename: (size, mtime)} for every HTML file in the folder."""
+        try:
+            with os.scandir(self.questions_dir) as entries:
+                return {e.name: (e.stat().st_size, e.stat().st_mtime)
+                        for e in entries if e.name.endswith(ingest.HTML_EXTENSION)}
+        except FileNotFoundError:
+            return {}
+
+    # --- DEBOUNCE ---
+    def _note(self, name):
+        if name.endswith(ingest.HTML_EXTENSION):
+            self._pending.add(os.path.join(self.questions_dir, name))
+            self._last_event = time.monotonic()
+
+    def _wait_time(self):
+        if not self._pending:
+            return self.poll_interval
+        return max(0.05, self.debounce - (time.monotonic() - self._last_event))
+
+    def _flush_if_quiet(self):
+        if not self._pending or time.monotonic() - self._last_event < self.debounce:
+            return
+        paths, self._pending = sorted(self._pending), set()
+        try:
+            imported, retired = ingest.sync_paths(paths)
+        except Exception as e:
+            print(f"❌ Live sync failed: {e}")
+            return
+        if (imported or retired) and self.on_change:
+            self.on_change(imported, retired)